@@ -0,0 +1,109 @@
+# Definitions that must stay the same object across Streamlit reruns. streamlit run re-executes
+# streamlit_app.py as a fresh module on every rerun, so a class or context variable defined there is a new
+# object each time, while st.cache_resource values built in an earlier rerun keep using the old one.
+# Anything raised, caught, compared or read across that boundary lives here; this module is imported once.
+import contextvars
+import sys
+import threading
+from collections import OrderedDict
+from enum import Enum
+
+# Deadline of the current rerun (time.monotonic()); unset in background pools
+current_deadline = contextvars.ContextVar("deadline", default=None)
+
+# (reserve, wait seconds) overriding the defaults for Airtable calls in this context
+airtable_call_policy = contextvars.ContextVar("airtable_call_policy", default=None)
+
+class UpstreamUnavailable(Exception):
+    pass
+
+# Throttled locally before reaching Airtable; callers treat it like any other unavailable upstream
+class AirtableRateLimited(UpstreamUnavailable):
+    pass
+
+# An archived output that could not be read back from the archive store
+class ArchiveUnavailable(Exception):
+    pass
+
+# Typed records: the pages work on these instead of raw Airtable dicts. They hold only what the list views
+# read; detail views work on the full record from get_record_detail.
+class RecordStatus(str, Enum):
+    REQUESTED = "Requested"
+    IN_PROGRESS = "In Progress"
+    COMPLETED = "Completed"
+    FAILED = "Failed"
+    CANCELLED = "Cancelled"
+    UPLOADED = "Uploaded"
+    UNKNOWN = "N/A"
+
+    @classmethod
+    def parse(cls, value):
+        try:
+            return cls(value)
+        except ValueError:
+            return cls.UNKNOWN
+
+class User:
+    __slots__ = ("id", "sub_status", "tokens", "name", "phone", "company_name", "website")
+
+    def __init__(self, id, sub_status, tokens, name, phone, company_name, website):
+        self.id = id
+        self.sub_status = sys.intern(sub_status)
+        self.tokens = tokens
+        self.name = name
+        self.phone = phone
+        self.company_name = company_name
+        self.website = website
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(data['id'], data['sub_status'], data['tokens'], data['name'], data['phone'], data['company_name'], data['website'])
+
+class ContentItem:
+    __slots__ = ("id", "created", "created_text", "content_type", "status", "spec", "label")
+
+    def __init__(self, id, created_text, created, content_type, status, spec):
+        self.id = id
+        self.created_text = created_text
+        self.created = created
+        self.content_type = sys.intern(content_type or "")
+        self.status = RecordStatus.parse(status)
+        self.spec = spec
+        self.label = f"{self.content_type or 'Untitled'} - {self.status.value}\nCreated: {self.created_text}"
+
+class Resume:
+    __slots__ = ("id", "created", "created_text", "kind", "status", "file_name", "label")
+
+    def __init__(self, id, created_text, created, kind, status, file_name):
+        self.id = id
+        self.created_text = created_text
+        self.created = created
+        self.kind = sys.intern(kind or "")
+        self.status = RecordStatus.parse(status)
+        self.file_name = file_name or "Untitled"
+        title = self.file_name if self.kind == "User Uploaded" else self.kind or "Untitled"
+        self.label = f"{title} - {self.status.value}\nCreated: {self.created_text}"
+
+# Built views per cache key, reused while the shared cache entry is unchanged. `stamp` identifies the
+# entry (its version and fetch time); None builds without keeping the result.
+class TypedViewCache:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, key, stamp, raw, build):
+        if stamp is None:
+            return build(raw)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] == stamp:
+                self.entries.move_to_end(key)
+                return entry[1]
+        built = build(raw)
+        with self.lock:
+            self.entries[key] = (stamp, built)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return built
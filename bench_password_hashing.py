@@ -0,0 +1,43 @@
+# Logins per second for each PBKDF2 cost setting on a pool the size of auth.hash_workers
+#
+#   python bench_password_hashing.py --costs 100000 200000 400000 --workers 4 --seconds 3
+#
+# Mirrors the verify step in streamlit_app.verify_password; the app module itself
+# needs Streamlit secrets at import time, so the hash call is repeated here.
+import argparse
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+def verify_once(iterations, salt):
+    hashlib.pbkdf2_hmac('sha256', b"benchmark-password", salt, iterations)
+
+def logins_per_second(iterations, workers, seconds):
+    salt = os.urandom(16)
+    deadline = time.perf_counter() + seconds
+    def worker():
+        count = 0
+        while time.perf_counter() < deadline:
+            verify_once(iterations, salt)
+            count += 1
+        return count
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        total = sum(pool.map(lambda _: worker(), range(workers)))
+    return total / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark password verification throughput per PBKDF2 cost")
+    parser.add_argument("--costs", type=int, nargs="+", default=[100000, 200000, 400000, 600000])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=3)
+    args = parser.parse_args()
+
+    print(f"{'iterations':>12} {'logins/s':>10} {'ms/login':>10}  (workers={args.workers})")
+    for iterations in args.costs:
+        rate = logins_per_second(iterations, args.workers, args.seconds)
+        print(f"{iterations:>12} {rate:>10.1f} {1000 * args.workers / rate:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import streamlit as st
 import hashlib
+import hmac
 import os
 import base64
 from pyairtable import Table
@@ -8,11 +9,35 @@ import stripe
 from datetime import datetime, timedelta, timezone
 from dateutil.relativedelta import relativedelta
 import logging
+import logging.handlers
+import queue
+import random
+import atexit
 import pdfplumber
-
-# Set up logging
-logging.basicConfig(level=logging.DEBUG)
-logger = logging.getLogger(__name__)
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import json
+import re
+import difflib
+import uuid
+import io
+import gzip
+import zlib
+import sqlite3
+import threading
+import time
+import math
+from collections import OrderedDict
+from contextlib import closing, contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from app_shared import (current_deadline, airtable_call_policy, UpstreamUnavailable, AirtableRateLimited, ArchiveUnavailable,
+                        User, ContentItem, Resume, TypedViewCache)
+
+# Set up logging (handlers are configured by configure_logging below). Named explicitly: under `streamlit run`
+# __name__ is "__main__", which the [logging] levels overrides could not address
+logger = logging.getLogger("streamlit_app")
 
 # Streamlit configuration (unchanged)
 st.set_page_config(page_title="AI Toolbox", page_icon="🛠️", layout="wide")
@@ -155,41 +180,1188 @@ TOKEN_COSTS = {
     "Resume Enhancement": 5
 }
 
-# Improved password hashing with salt
-def hash_password(password):
+def token_cost_for(content_type, word_count=None):
+    cost = TOKEN_COSTS[content_type]
+    if callable(cost):
+        return cost(word_count or 500)
+    return cost
+
+# Every content status change also stamps "<Status>At" so pipeline latency can be measured
+STATUS_TIMESTAMP_FIELDS = {
+    "Requested": "RequestedAt",
+    "In Progress": "InProgressAt",
+    "Completed": "CompletedAt",
+    "Failed": "FailedAt",
+    "Cancelled": "CancelledAt"
+}
+
+def status_fields(status, at=None):
+    fields = {
+        "Status": status,
+        STATUS_TIMESTAMP_FIELDS[status]: (at or datetime.now(timezone.utc)).isoformat()
+    }
+    if status == "Requested":
+        # A new run starts over; times left from the previous run would never be re-stamped
+        fields.update({field: None for name, field in STATUS_TIMESTAMP_FIELDS.items() if name != "Requested"})
+    return fields
+
+# Structured request spec stored as JSON in the "Spec" field, separate from the prose in "Details"
+SPEC_SCHEMA_VERSION = 1
+
+def build_content_spec(content_type, keywords="", word_count=None, platform=""):
+    if isinstance(keywords, str):
+        keywords = [k.strip() for k in keywords.split(",") if k.strip()]
+    return {
+        "schema_version": SPEC_SCHEMA_VERSION,
+        "content_type": content_type,
+        "keywords": keywords,
+        "word_count": int(word_count) if word_count else None,
+        "platform": platform or None
+    }
+
+# Upgrade steps keyed by the version they upgrade from
+SPEC_MIGRATIONS = {}
+
+def load_content_spec(fields):
+    content_type = fields.get('ContentType', '')
+    raw = fields.get('Spec')
+    if raw:
+        try:
+            spec = json.loads(raw)
+            version = spec.get("schema_version", 1)
+            while version < SPEC_SCHEMA_VERSION:
+                spec = SPEC_MIGRATIONS[version](spec)
+                version = spec["schema_version"]
+            return spec
+        except (ValueError, KeyError, AttributeError) as e:
+            logger.warning(f"Invalid Spec on content record, using defaults: {str(e)}")
+    # Legacy records kept the spec dict inside Details
+    word_count = None
+    match = re.search(r"word_count['\"]?\s*:\s*['\"]?(\d+)", fields.get('Details', ''))
+    if match:
+        word_count = int(match.group(1))
+    return build_content_spec(content_type, word_count=word_count)
+
+def dump_content_spec(spec):
+    return json.dumps(spec, sort_keys=True)
+
+# Markdown sections: a preamble followed by one section per heading line
+HEADING_RE = re.compile(r"^#{1,6}\s+\S")
+
+def split_sections(output):
+    sections = [{"heading": "", "lines": []}]
+    for line in (output or "").split("\n"):
+        if HEADING_RE.match(line):
+            sections.append({"heading": line.strip(), "lines": []})
+        else:
+            sections[-1]["lines"].append(line)
+    result = []
+    for index, section in enumerate(sections):
+        body = "\n".join(section["lines"])
+        if index == 0 and not body.strip():
+            continue
+        result.append({"heading": section["heading"], "body": body})
+    return result
+
+def join_sections(sections):
+    parts = []
+    for section in sections:
+        parts.append(f"{section['heading']}\n{section['body']}" if section['heading'] else section['body'])
+    return "\n".join(parts)
+
+def changed_section_indexes(previous_output, edited_output):
+    previous = [(s['heading'], s['body'].strip()) for s in split_sections(previous_output)]
+    edited = [(s['heading'], s['body'].strip()) for s in split_sections(edited_output)]
+    matcher = difflib.SequenceMatcher(a=previous, b=edited, autojunk=False)
+    changed = []
+    for tag, _, _, j1, j2 in matcher.get_opcodes():
+        if tag in ("replace", "insert"):
+            changed.extend(range(j1, j2))
+    return changed
+
+def plan_regeneration(fields, previous_spec, edited_spec, edited_details, edited_output):
+    sections = split_sections(edited_output)
+    full = (
+        previous_spec != edited_spec
+        or edited_details != fields.get('Details', '')
+        or not sections
+    )
+    if not full:
+        indexes = changed_section_indexes(fields.get('Output', ''), edited_output)
+        if indexes:
+            return [dict(sections[i], index=i) for i in indexes]
+    return None
+
+def regeneration_token_cost(content_type, spec, regenerate_sections):
+    if regenerate_sections is None:
+        return token_cost_for(content_type, spec.get("word_count"))
+    word_count = sum(len(s['body'].split()) for s in regenerate_sections)
+    return token_cost_for(content_type, word_count)
+
+# Merge per-section results written by the generation backend into "SectionOutput"
+def merge_section_output(content_id, fields):
+    raw = fields.get('SectionOutput')
+    if not raw or fields.get('Status') != "Completed":
+        return fields
+    try:
+        updates = json.loads(raw)
+    except ValueError as e:
+        logger.error(f"Invalid SectionOutput on {content_id}: {str(e)}")
+        return fields
+    sections = split_sections(fields.get('Output', ''))
+    # Highest index first so multi-section results don't shift pending indexes
+    for index, text in sorted(((int(i), t) for i, t in updates.items()), reverse=True):
+        regenerated = split_sections(text)
+        if 0 <= index < len(sections) and regenerated:
+            sections[index:index + 1] = regenerated
+    merged = join_sections(sections)
+    content_table.update(content_id, {"Output": merged, "SectionOutput": ""})
+    invalidate_content_detail(content_id)
+    return dict(fields, Output=merged, SectionOutput="")
+
+# Social fan-out: one generation job for several platforms. The backend writes the combined
+# output, one "## <Platform>" section each, to the group's primary record, which is then split
+# across the per-platform child records.
+SOCIAL_PLATFORMS = ["Facebook", "Twitter", "Instagram", "LinkedIn"]
+
+def split_fan_out_output(output, platforms):
+    by_platform = {}
+    for section in split_sections(output):
+        heading = section['heading'].lstrip("#").strip().rstrip(":").lower()
+        for platform in platforms:
+            if heading == platform.lower() or heading.startswith(platform.lower() + " "):
+                by_platform[platform] = section['body'].strip()
+    return by_platform
+
+def pending_fan_out_primary(spec, status):
+    fan_out = spec.get("fan_out") or {}
+    return fan_out.get("primary") and not fan_out.get("split") and status in ["Completed", "Failed", "Cancelled"]
+
+def is_pending_fan_out_primary(fields):
+    return pending_fan_out_primary(load_content_spec(fields), fields.get('Status'))
+
+# Children the user cancelled stay Cancelled and a cancelled primary cancels the whole group. Charging is
+# left to the backend, which deducts each child's token_cost for the platform sections it writes.
+def resolve_fan_out_group(primary_id, user_email):
+    primary = content_table.get(primary_id)
+    fields = primary['fields']
+    if not is_pending_fan_out_primary(fields):
+        return
+    # Only one replica splits a group
+    if not shared_cache().claim(f"fan_out_split:{primary_id}", 3600):
+        return
+    spec = load_content_spec(fields)
+    fan_out = spec["fan_out"]
+    primary_status = fields.get('Status')
+    by_platform = split_fan_out_output(fields.get('Output', ''), fan_out["platforms"]) if primary_status == "Completed" else {}
+    statuses = {record['id']: record['fields'].get('Status') for record in records_by_id(content_table, fan_out["record_ids"], ["Status"])}
+    updates = []
+    for record_id, platform in zip(fan_out["record_ids"], fan_out["platforms"]):
+        child_spec = dict(spec, platform=platform, fan_out=dict(fan_out, primary=record_id == primary_id, split=True))
+        child_fields = {"Spec": dump_content_spec(child_spec)}
+        output = by_platform.get(platform)
+        if statuses.get(record_id) == "Cancelled":
+            pass
+        elif primary_status == "Cancelled":
+            child_fields.update(status_fields("Cancelled"))
+        else:
+            child_fields.update(status_fields("Completed" if output else "Failed"))
+            child_fields["Output"] = output or ""
+        updates.append({"id": record_id, "fields": child_fields})
+    content_table.batch_update(updates)
+    invalidate_user_content(user_email, *fan_out["record_ids"])
+
+def resolve_fan_out_groups(items, user_email):
+    for item in items:
+        if pending_fan_out_primary(item.spec, item.status):
+            try:
+                resolve_fan_out_group(item.id, user_email)
+            except Exception as e:
+                logger.error(f"Failed to split fan-out output of {item.id}: {str(e)}")
+
+# Optional settings with defaults
+def get_setting(section, key, default=None):
+    try:
+        return st.secrets[section][key]
+    except (KeyError, FileNotFoundError):
+        return default
+
+# Logging: JSON lines written by a background listener; records are sampled and redacted before they are queued
+LOG_LEVEL = get_setting("logging", "level", "INFO")
+LOG_LEVELS = {"urllib3": "WARNING", "stripe": "WARNING", "pdfminer": "WARNING", "watchdog": "WARNING",
+              **get_setting("logging", "levels", {})}
+LOG_DEBUG_SAMPLE_RATE = get_setting("logging", "debug_sample_rate", 0.1)
+LOG_MAX_MESSAGE_CHARS = get_setting("logging", "max_message_chars", 2000)
+LOG_MAX_FIELD_CHARS = get_setting("logging", "max_field_chars", 200)
+LOG_QUEUE_SIZE = get_setting("logging", "queue_size", 10000)
+# Payload keys whose values are user content and are logged as a length only
+REDACTED_PAYLOAD_KEYS = {"details", "output", "resume", "sections", "password", "text"}
+REDACTION_PATTERNS = [
+    (re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+"), "<email>"),
+    (re.compile(r"(?i)bearer\s+[\w.~+/=-]+"), "Bearer <token>"),
+    (re.compile(r"\b(?:pat[\w]{14}\.[\w]{20,}|key[\w]{14})\b"), "<airtable-token>"),
+    (re.compile(r"\b(?:sk|rk|pk)_(?:live|test)_[\w]+"), "<stripe-key>"),
+    (re.compile(r"(?i)((?:token|secret|password|api_key)['\"]?\s*[:=]\s*['\"]?)[^\s'\",}]+"), r"\1<redacted>")
+]
+
+def redact_text(text):
+    for pattern, replacement in REDACTION_PATTERNS:
+        text = pattern.sub(replacement, text)
+    if len(text) > LOG_MAX_MESSAGE_CHARS:
+        text = f"{text[:LOG_MAX_MESSAGE_CHARS]}... <{len(text) - LOG_MAX_MESSAGE_CHARS} more chars>"
+    return text
+
+# Copy of a webhook payload that is safe to log
+def redact_payload(payload):
+    if isinstance(payload, dict):
+        return {
+            key: f"<{len(json.dumps(value, default=str))} chars>" if key in REDACTED_PAYLOAD_KEYS and value else redact_payload(value)
+            for key, value in payload.items()
+        }
+    if isinstance(payload, list):
+        return [redact_payload(value) for value in payload]
+    if isinstance(payload, str) and len(payload) > LOG_MAX_FIELD_CHARS:
+        return f"{payload[:LOG_MAX_FIELD_CHARS]}..."
+    return payload
+
+class DebugSamplingFilter(logging.Filter):
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or getattr(record, "sampled", False) or random.random() < LOG_DEBUG_SAMPLE_RATE
+
+# Samples up front so costly DEBUG messages are only built for records that will be kept; log those with SAMPLED
+SAMPLED = {"sampled": True}
+
+def debug_sampled():
+    return logger.isEnabledFor(logging.DEBUG) and random.random() < LOG_DEBUG_SAMPLE_RATE
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "thread": record.threadName
+        }
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+# Formats and redacts in the caller, then hands off without blocking; drops records when the queue is full
+class AsyncLogHandler(logging.handlers.QueueHandler):
+    dropped = 0
+
+    def prepare(self, record):
+        if record.exc_info and not record.exc_text:
+            record.exc_text = redact_text(logging.Formatter().formatException(record.exc_info))
+        record.msg = redact_text(record.getMessage())
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            AsyncLogHandler.dropped += 1
+
+@st.cache_resource
+def configure_logging():
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(JsonFormatter())
+    listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    handler = AsyncLogHandler(log_queue)
+    handler.addFilter(DebugSamplingFilter())
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(LOG_LEVEL)
+    for name, level in LOG_LEVELS.items():
+        logging.getLogger(name).setLevel(level)
+    return listener
+
+configure_logging()
+
+LOCAL_DATA_DIR = get_setting("storage", "data_dir", ".data")
+os.makedirs(LOCAL_DATA_DIR, exist_ok=True)
+
+def local_db(name):
+    conn = sqlite3.connect(os.path.join(LOCAL_DATA_DIR, name), timeout=10, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+# Latency budgets: every rerun sets a deadline and each outbound HTTP call (Airtable, webhooks, uploads, Stripe)
+# takes its timeout from what is left of it. Background pools have no deadline and use the default timeout.
+PAGE_BUDGET_SECONDS = get_setting("deadlines", "page_seconds", 2)
+DETAIL_BUDGET_SECONDS = get_setting("deadlines", "detail_seconds", 5)
+ACTION_BUDGET_SECONDS = get_setting("deadlines", "action_seconds", 10)
+DEFAULT_CALL_TIMEOUT = get_setting("deadlines", "default_call_timeout", 10)
+# Floor so required reads still get a fair attempt once the budget is spent
+MIN_CALL_TIMEOUT = get_setting("deadlines", "min_call_timeout", 1)
+OPTIONAL_SECTION_MIN_SECONDS = get_setting("deadlines", "optional_section_min_seconds", 0.5)
+
+# Buttons that write (uploads, generation requests, checkout) reset it to the action budget
+def set_deadline(seconds):
+    current_deadline.set(time.monotonic() + seconds)
+
+def remaining_budget():
+    expires_at = current_deadline.get()
+    return None if expires_at is None else max(0.0, expires_at - time.monotonic())
+
+def within_budget(min_seconds=OPTIONAL_SECTION_MIN_SECONDS):
+    remaining = remaining_budget()
+    return remaining is None or remaining >= min_seconds
+
+def call_timeout(requested=None):
+    timeout = min(requested or DEFAULT_CALL_TIMEOUT, DEFAULT_CALL_TIMEOUT)
+    remaining = remaining_budget()
+    if remaining is not None:
+        timeout = min(timeout, max(remaining, MIN_CALL_TIMEOUT))
+    return timeout
+
+class DeadlineSession(requests.Session):
+    def send(self, request, **kwargs):
+        if not isinstance(kwargs.get("timeout"), tuple):
+            kwargs["timeout"] = call_timeout(kwargs.get("timeout"))
+        return super().send(request, **kwargs)
+
+@st.cache_resource
+def outbound_session():
+    return DeadlineSession()
+
+# Process-wide token bucket every Airtable request draws from (Airtable allows 5 requests/s per base)
+AIRTABLE_REQUESTS_PER_SECOND = get_setting("airtable", "requests_per_second", 5)
+# Calls made outside a page rerun (background pools have no deadline) leave this many tokens for page loads
+AIRTABLE_RESERVE_TOKENS = get_setting("airtable", "reserve_tokens", 2)
+
+class RateLimiter:
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # Takes a token only if at least `reserve` would remain, so background work never starves the foreground
+    def try_acquire(self, reserve=0):
+        return self.acquire(reserve, timeout=0)
+
+    # Waits up to `timeout` seconds (forever when None); returns False if no token came free in time
+    def acquire(self, reserve=0, timeout=None):
+        give_up_at = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens - 1 >= reserve:
+                    self.tokens -= 1
+                    return True
+                delay = (1 + reserve - self.tokens) / self.rate
+            if give_up_at is not None and time.monotonic() + delay > give_up_at:
+                return False
+            time.sleep(delay)
+
+@st.cache_resource
+def airtable_rate_limiter():
+    return RateLimiter(AIRTABLE_REQUESTS_PER_SECOND)
+
+# The prefetcher drops instead of waiting
+@contextmanager
+def airtable_policy(reserve, wait):
+    token = airtable_call_policy.set((reserve, wait))
+    try:
+        yield
+    finally:
+        airtable_call_policy.reset(token)
+
+class AirtableSession(DeadlineSession):
+    def send(self, request, **kwargs):
+        policy = airtable_call_policy.get()
+        if policy is None:
+            policy = (0 if remaining_budget() is not None else AIRTABLE_RESERVE_TOKENS, call_timeout())
+        if not airtable_rate_limiter().acquire(*policy):
+            raise AirtableRateLimited(f"No Airtable rate-limit token within {policy[1]:.1f}s")
+        return super().send(request, **kwargs)
+
+@st.cache_resource
+def airtable_session():
+    return AirtableSession()
+
+# pyairtable builds its own session per Api; swap in one that applies the deadline and rate limit, keeping its auth header and retry adapters
+def install_airtable_session(api):
+    session = AirtableSession()
+    session.headers.update(api.session.headers)
+    for prefix, adapter in api.session.adapters.items():
+        session.mount(prefix, adapter)
+    api.session = session
+
+for airtable_api in {id(table.api): table.api for table in (users_table, content_table, resumes_table)}.values():
+    install_airtable_session(airtable_api)
+
+# stripe exports RequestsClient at the top level (releases before 8 only had it under stripe.http_client);
+# without either, Stripe keeps its own client and checkout calls go without the deadline
+stripe_requests_client = getattr(stripe, "RequestsClient", None) or getattr(getattr(stripe, "http_client", None), "RequestsClient", None)
+if stripe_requests_client:
+    stripe.default_http_client = stripe_requests_client(session=outbound_session())
+else:
+    logger.warning("stripe has no RequestsClient; Stripe calls do not use the page deadline")
+
+# Optional sections render a placeholder instead of holding up the page once the budget is spent
+def render_optional(render, placeholder):
+    if not within_budget():
+        st.caption(placeholder)
+        return
+    try:
+        render()
+    except (requests.exceptions.RequestException, UpstreamUnavailable) as e:
+        logger.warning(f"Optional section skipped: {str(e)}")
+        st.caption(placeholder)
+
+# Streaming output: the generation backend appends chunks per record, the Preview tab renders them as they arrive
+STREAMING_ENABLED = get_setting("streaming", "enabled", False)
+STREAM_POLL_SECONDS = get_setting("streaming", "poll_seconds", 1)
+
+class OutputChunkStore:
+    def __init__(self, name="output_chunks.db"):
+        self.name = name
+        with closing(local_db(self.name)) as conn, conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS output_chunks (
+                record_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                text TEXT,
+                done INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (record_id, seq))""")
+
+    def append(self, record_id, seq, text, done=False):
+        with closing(local_db(self.name)) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO output_chunks VALUES (?, ?, ?, ?)", (record_id, seq, text, int(done)))
+
+    # Returns (chunks after `after_seq`, done flag)
+    def read(self, record_id, after_seq=-1):
+        with closing(local_db(self.name)) as conn:
+            rows = conn.execute(
+                "SELECT seq, text, done FROM output_chunks WHERE record_id = ? AND seq > ? ORDER BY seq",
+                (record_id, after_seq)).fetchall()
+        return [(seq, text or "") for seq, text, _ in rows], any(done for _, _, done in rows)
+
+    def clear(self, record_id):
+        with closing(local_db(self.name)) as conn, conn:
+            conn.execute("DELETE FROM output_chunks WHERE record_id = ?", (record_id,))
+
+# Local callback endpoint: POST /chunks/<record_id> with {"seq": n, "text": "...", "done": false}
+class ChunkCallbackHandler(BaseHTTPRequestHandler):
+    store = None
+    token = None
+
+    def do_POST(self):
+        parts = self.path.strip("/").split("/")
+        if len(parts) != 2 or parts[0] != "chunks":
+            self.send_error(404)
+            return
+        if not hmac.compare_digest(self.headers.get("X-Stream-Token", ""), self.token):
+            self.send_error(403)
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            self.store.append(parts[1], int(body["seq"]), body.get("text", ""), bool(body.get("done")))
+        except (ValueError, KeyError) as e:
+            self.send_error(400, str(e))
+            return
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        logger.debug("chunk callback: " + format, *args)
+
+@st.cache_resource
+def get_chunk_store():
+    store = OutputChunkStore()
+    port = get_setting("streaming", "callback_port")
+    token = get_setting("streaming", "callback_token")
+    if STREAMING_ENABLED and port and not token:
+        # The endpoint writes straight into users' previews, so it never runs unauthenticated
+        logger.error("streaming.callback_port is set without streaming.callback_token; the chunk callback endpoint is disabled")
+    elif STREAMING_ENABLED and port:
+        handler = type("BoundChunkCallbackHandler", (ChunkCallbackHandler,), {
+            "store": store,
+            "token": token
+        })
+        server = ThreadingHTTPServer(("0.0.0.0", int(port)), handler)
+        threading.Thread(target=server.serve_forever, daemon=True, name="chunk-callback").start()
+    return store
+
+def stream_callback_url(record_id):
+    base_url = get_setting("streaming", "callback_url")
+    return f"{base_url.rstrip('/')}/chunks/{record_id}" if base_url else None
+
+# Local fake generator for exercising the streaming path without Make; like the backend, a partial
+# regeneration only writes the listed sections to "SectionOutput" and leaves Output alone
+def fake_stream_generation(record_id, details, sections=None, chunk_words=25, delay=0.3):
+    filler = "Lorem ipsum dolor sit amet. "
+    if sections is None:
+        texts = {None: f"# Draft\n\n{details}\n\n" + filler * 200}
+    else:
+        texts = {str(s['index']): (f"{s['heading']}\n" if s['heading'] else "") + filler * 40 for s in sections}
+
+    def run():
+        store = get_chunk_store()
+        seq = 0
+        for text in texts.values():
+            words = text.split(" ")
+            for start in range(0, len(words), chunk_words):
+                store.append(record_id, seq, " ".join(words[start:start + chunk_words]) + " ")
+                seq += 1
+                time.sleep(delay)
+        if sections is None:
+            content_table.update(record_id, {"Output": texts[None], **status_fields("Completed")})
+        else:
+            content_table.update(record_id, {"SectionOutput": json.dumps(texts), **status_fields("Completed")})
+        store.append(record_id, seq, "", done=True)
+    threading.Thread(target=run, daemon=True, name=f"fake-generator-{record_id}").start()
+
+# Reruns on its own timer and only reads chunks past the last seen seq
+@st.fragment(run_every=STREAM_POLL_SECONDS)
+def stream_preview(content_id):
+    state = st.session_state.setdefault(f"stream_{content_id}", {"seq": -1, "text": "", "done": False})
+    chunks, done = get_chunk_store().read(content_id, state["seq"])
+    for seq, text in chunks:
+        state["seq"] = seq
+        state["text"] += text
+    if state["text"]:
+        st.markdown(state["text"])
+    else:
+        st.caption("Waiting for the first chunk...")
+    if done and not state["done"]:
+        # One full rerun to pick up the completed record; if Airtable lags behind the
+        # done chunk the preview stays as is instead of rerunning on every poll
+        state["done"] = True
+        invalidate_content_detail(content_id)
+        st.rerun()
+
+def reset_stream(content_id):
+    get_chunk_store().clear(content_id)
+    st.session_state.pop(f"stream_{content_id}", None)
+
+# Shared state backend: versioned entries plus pub/sub invalidation so replicas share user, content and usage caches
+STATE_BACKEND = get_setting("state", "backend", "memory")
+STATE_INVALIDATION_CHANNEL = "invalidate"
+USER_CACHE_TTL = get_setting("state", "user_ttl", 300)
+CONTENT_CACHE_TTL = get_setting("state", "content_ttl", 15)
+LOCAL_CACHE_TTL = get_setting("state", "local_ttl", 5)
+
+class InProcessStateBackend:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.subscribers = {}
+
+    # Returns (value, version); version 0 means missing
+    def get(self, key):
+        with self.lock:
+            value, version, expires = self.entries.get(key, (None, 0, None))
+            if expires is not None and expires < time.time():
+                return None, version
+            return value, version
+
+    # Returns the new version, or None when if_version no longer matches
+    def set(self, key, value, ttl=None, if_version=None):
+        with self.lock:
+            _, version, _ = self.entries.get(key, (None, 0, None))
+            if if_version is not None and if_version != version:
+                return None
+            self.entries[key] = (value, version + 1, time.time() + ttl if ttl else None)
+            return version + 1
+
+    def delete(self, key):
+        with self.lock:
+            _, version, _ = self.entries.get(key, (None, 0, None))
+            self.entries[key] = (None, version + 1, time.time())
+
+    def publish(self, channel, message):
+        for callback in list(self.subscribers.get(channel, [])):
+            callback(message)
+
+    def subscribe(self, channel, callback):
+        self.subscribers.setdefault(channel, []).append(callback)
+
+# SQLite file shared by replicas on one host; pub/sub is an events table tailed by a poller thread
+class SQLiteStateBackend(InProcessStateBackend):
+    def __init__(self, name="state.db", poll_seconds=0.5, event_retention=300):
+        super().__init__()
+        self.name = name
+        self.poll_seconds = poll_seconds
+        self.event_retention = event_retention
+        with closing(local_db(self.name)) as conn, conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT, version INTEGER NOT NULL, expires REAL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS events (id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT, message TEXT, created REAL)")
+            self.last_event = conn.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+        self.poller = None
+
+    def get(self, key):
+        with closing(local_db(self.name)) as conn:
+            row = conn.execute("SELECT value, version, expires FROM kv WHERE key = ?", (key,)).fetchone()
+        if not row:
+            return None, 0
+        if row[0] is None or (row[2] is not None and row[2] < time.time()):
+            return None, row[1]
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value, ttl=None, if_version=None):
+        with closing(local_db(self.name)) as conn, conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT version FROM kv WHERE key = ?", (key,)).fetchone()
+            version = row[0] if row else 0
+            if if_version is not None and if_version != version:
+                return None
+            conn.execute("INSERT OR REPLACE INTO kv VALUES (?, ?, ?, ?)",
+                         (key, json.dumps(value), version + 1, time.time() + ttl if ttl else None))
+            return version + 1
+
+    # Bumps the version even for a missing key, so a load that started before the delete cannot write
+    def delete(self, key):
+        with closing(local_db(self.name)) as conn, conn:
+            conn.execute("INSERT INTO kv VALUES (?, NULL, 1, NULL) ON CONFLICT(key) DO UPDATE SET value = NULL, version = version + 1", (key,))
+
+    def publish(self, channel, message):
+        with closing(local_db(self.name)) as conn, conn:
+            conn.execute("INSERT INTO events (channel, message, created) VALUES (?, ?, ?)", (channel, json.dumps(message), time.time()))
+
+    def subscribe(self, channel, callback):
+        super().subscribe(channel, callback)
+        if self.poller is None:
+            self.poller = threading.Thread(target=self._poll, daemon=True, name="state-events")
+            self.poller.start()
+
+    def _poll(self):
+        while True:
+            try:
+                with closing(local_db(self.name)) as conn, conn:
+                    rows = conn.execute("SELECT id, channel, message FROM events WHERE id > ? ORDER BY id", (self.last_event,)).fetchall()
+                    conn.execute("DELETE FROM events WHERE created < ?", (time.time() - self.event_retention,))
+                for event_id, channel, message in rows:
+                    self.last_event = event_id
+                    InProcessStateBackend.publish(self, channel, json.loads(message))
+            except Exception as e:
+                logger.error(f"State event poll failed: {str(e)}")
+            time.sleep(self.poll_seconds)
+
+# Any Redis-protocol server (redis, valkey, a local stand-in); entries are hashes of value, version and expiry.
+# Like the other backends, an expired or deleted entry keeps its version; the key itself is only
+# reclaimed STATE_VERSION_RETENTION seconds later, far beyond any load that could still be in flight.
+STATE_VERSION_RETENTION = 86400
+
+class RedisStateBackend:
+    def __init__(self, url):
+        import redis
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.pubsub = None
+
+    def get(self, key):
+        value, version, expires = self.client.hmget(f"state:{key}", "value", "version", "expires")
+        version = int(version or 0)
+        if value is None or (expires and float(expires) < time.time()):
+            return None, version
+        return json.loads(value), version
+
+    def set(self, key, value, ttl=None, if_version=None):
+        from redis.exceptions import WatchError
+        redis_key = f"state:{key}"
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(redis_key)
+                version = int(pipe.hget(redis_key, "version") or 0)
+                if if_version is not None and if_version != version:
+                    return None
+                pipe.multi()
+                pipe.hset(redis_key, mapping={"value": json.dumps(value), "version": version + 1,
+                                              "expires": time.time() + ttl if ttl else ""})
+                if ttl:
+                    pipe.expire(redis_key, int(ttl) + STATE_VERSION_RETENTION)
+                else:
+                    pipe.persist(redis_key)
+                pipe.execute()
+                return version + 1
+            except WatchError:
+                return None
+
+    def delete(self, key):
+        redis_key = f"state:{key}"
+        with self.client.pipeline() as pipe:
+            pipe.hdel(redis_key, "value")
+            pipe.hincrby(redis_key, "version", 1)
+            pipe.expire(redis_key, STATE_VERSION_RETENTION)
+            pipe.execute()
+
+    def publish(self, channel, message):
+        self.client.publish(channel, json.dumps(message))
+
+    def subscribe(self, channel, callback):
+        if self.pubsub is None:
+            self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        first_subscription = not self.pubsub.channels
+        self.pubsub.subscribe(**{channel: lambda event: callback(json.loads(event["data"]))})
+        if first_subscription:
+            self.pubsub.run_in_thread(sleep_time=0.1, daemon=True)
+
+# Process-local copy in front of the backend, dropped when any replica invalidates a key
+class SharedCache:
+    def __init__(self, backend, local_ttl=LOCAL_CACHE_TTL):
+        self.backend = backend
+        self.local_ttl = local_ttl
+        self.lock = threading.Lock()
+        self.local = {}
+        backend.subscribe(STATE_INVALIDATION_CHANNEL, self._on_invalidate)
+
+    def _on_invalidate(self, key):
+        with self.lock:
+            self.local.pop(key, None)
+
+    def get(self, key):
+        return self.get_versioned(key)[0]
+
+    # The value plus its version, which changes with every write
+    def get_versioned(self, key):
+        with self.lock:
+            entry = self.local.get(key)
+        if entry and entry[2] > time.time():
+            return entry[0], entry[1]
+        value, version = self.backend.get(key)
+        if value is not None:
+            with self.lock:
+                self.local[key] = (value, version, time.time() + self.local_ttl)
+        return value, version
+
+    # Returns the new version, or None when if_version no longer matches
+    def set(self, key, value, ttl=None, if_version=None):
+        version = self.backend.set(key, value, ttl, if_version=if_version)
+        if version is None:
+            return None
+        with self.lock:
+            self.local[key] = (value, version, time.time() + min(self.local_ttl, ttl or self.local_ttl))
+        self.backend.publish(STATE_INVALIDATION_CHANNEL, key)
+        return version
+
+    # Runs the loader and stores its result only if nobody wrote or invalidated the key meanwhile;
+    # the caller gets the loaded value either way
+    def load(self, key, loader, ttl=None):
+        _, version = self.backend.get(key)
+        value = loader()
+        self.set(key, value, ttl, if_version=version)
+        return value
+
+    # Read-modify-write that retries when another replica wrote in between
+    def update(self, key, fn, ttl=None, attempts=5):
+        for _ in range(attempts):
+            value, version = self.backend.get(key)
+            if value is None:
+                return None
+            updated = fn(value)
+            if self.backend.set(key, updated, ttl, if_version=version) is not None:
+                with self.lock:
+                    self.local.pop(key, None)
+                self.backend.publish(STATE_INVALIDATION_CHANNEL, key)
+                return updated
+        self.invalidate(key)
+        return None
+
+    def invalidate(self, key):
+        self.backend.delete(key)
+        with self.lock:
+            self.local.pop(key, None)
+        self.backend.publish(STATE_INVALIDATION_CHANNEL, key)
+
+    # True for exactly one caller until the key expires
+    def claim(self, key, ttl):
+        value, version = self.backend.get(key)
+        if value is not None:
+            return False
+        return self.backend.set(key, True, ttl, if_version=version) is not None
+
+    def get_or_load(self, key, loader, ttl=None):
+        value = self.get(key)
+        if value is None:
+            value = self.load(key, loader, ttl)
+        return value
+
+@st.cache_resource
+def shared_cache():
+    if STATE_BACKEND == "redis":
+        backend = RedisStateBackend(get_setting("state", "redis_url", "redis://localhost:6379/0"))
+    elif STATE_BACKEND == "sqlite":
+        backend = SQLiteStateBackend(get_setting("state", "sqlite_name", "state.db"))
+    else:
+        backend = InProcessStateBackend()
+    return SharedCache(backend)
+
+def user_cache_key(user_id):
+    return f"user:{user_id}"
+
+def content_cache_key(user_email):
+    return f"content:{user_email.lower()}"
+
+def resumes_cache_key(user_email):
+    return f"resumes:{user_email.lower()}"
+
+# Drops the user's list and the detail records of any content ids given
+def invalidate_user_content(user_email, *content_ids):
+    shared_cache().invalidate(content_cache_key(user_email))
+    for content_id in content_ids:
+        invalidate_content_detail(content_id)
+
+def invalidate_user_resumes(user_email):
+    shared_cache().invalidate(resumes_cache_key(user_email))
+
+# Resilience: a circuit breaker per Airtable table plus stale-while-revalidate reads over the shared cache
+BREAKER_FAILURE_THRESHOLD = get_setting("resilience", "failure_threshold", 5)
+BREAKER_SLOW_CALL_SECONDS = get_setting("resilience", "slow_call_seconds", 5)
+BREAKER_OPEN_SECONDS = get_setting("resilience", "open_seconds", 30)
+# How long a last known good result may still be served after it stops being fresh
+STALE_RETENTION_SECONDS = get_setting("resilience", "stale_retention_seconds", 86400)
+
+class CircuitBreaker:
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def is_open(self):
+        with self.lock:
+            return self.opened_at is not None and time.time() - self.opened_at < BREAKER_OPEN_SECONDS
+
+    # Open: fail fast. After open_seconds one trial call goes through (half-open) and decides
+    def call(self, fn):
+        with self.lock:
+            if self.opened_at is not None:
+                if time.time() - self.opened_at < BREAKER_OPEN_SECONDS or self.trial_in_flight:
+                    raise UpstreamUnavailable(f"Airtable {self.name} circuit open")
+                self.trial_in_flight = True
+        started = time.monotonic()
+        try:
+            result = fn()
+        except AirtableRateLimited:
+            # Throttled locally: the upstream was never asked, so the call says nothing about its health
+            with self.lock:
+                self.trial_in_flight = False
+            raise
+        except Exception:
+            self._record(False)
+            raise
+        # A slow success still counts against the upstream
+        self._record(time.monotonic() - started < BREAKER_SLOW_CALL_SECONDS)
+        return result
+
+    def _record(self, ok):
+        with self.lock:
+            self.trial_in_flight = False
+            if ok:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.opened_at is not None or self.failures >= BREAKER_FAILURE_THRESHOLD:
+                if self.opened_at is None:
+                    logger.warning(f"Opening Airtable {self.name} circuit after {self.failures} failure(s)")
+                self.opened_at = time.time()
+
+@st.cache_resource
+def circuit_breakers():
+    return {name: CircuitBreaker(name) for name in ["users", "content", "resumes"]}
+
+def guarded(table_name, fn):
+    return circuit_breakers()[table_name].call(fn)
+
+@st.cache_resource
+def get_refresh_pool():
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="swr-refresh"), set(), threading.Lock()
+
+# Cache entries carry their fetch time; a load never overwrites a newer write or an invalidation
+def load_entry(key, table_name, loader):
+    return shared_cache().load(key, lambda: {"value": guarded(table_name, loader), "fetched_at": time.time()}, STALE_RETENTION_SECONDS)
+
+def refresh_in_background(key, table_name, loader):
+    pool, in_flight, lock = get_refresh_pool()
+    with lock:
+        if key in in_flight:
+            return
+        in_flight.add(key)
+
+    def run():
+        try:
+            load_entry(key, table_name, loader)
+        except Exception as e:
+            logger.warning(f"Background refresh of {key} failed: {str(e)}")
+        finally:
+            with lock:
+                in_flight.discard(key)
+    pool.submit(run)
+
+# Records which data on the current page came from a stale copy (script thread only)
+def note_stale(label):
+    st.session_state.setdefault('stale_sources', set()).add(label)
+
+# Data the page could not show at all: no cached copy and the fetch failed
+def note_unavailable(label):
+    st.session_state.setdefault('unavailable_sources', set()).add(label)
+
+# Fresh entries are returned as is; stale ones are returned immediately and refreshed in the background.
+# With nothing cached, any failure to load surfaces as UpstreamUnavailable, not only an open circuit.
+def swr_get(key, table_name, loader, fresh_ttl, label, build=None):
+    entry, version = shared_cache().get_versioned(key)
+    stamp = None
+    if entry is not None:
+        stamp = (version, entry["fetched_at"])
+        if time.time() - entry["fetched_at"] > fresh_ttl:
+            refresh_in_background(key, table_name, loader)
+            if circuit_breakers()[table_name].is_open():
+                note_stale(label)
+        value = entry["value"]
+    else:
+        try:
+            value = load_entry(key, table_name, loader)["value"]
+        except UpstreamUnavailable:
+            raise
+        except Exception as e:
+            logger.error(f"Loading {key} from Airtable {table_name} failed: {str(e)}")
+            raise UpstreamUnavailable(f"Airtable {table_name} unavailable: {str(e)}") from e
+    return typed_views().get(key, stamp, value, build) if build else value
+
+# Typed records (defined in app_shared): the shared cache holds raw JSON, the list pages work on these.
+# Timestamps, statuses and spec are parsed once when a cached list is first read after a fetch, not on every rerun.
+TYPED_VIEW_ENTRIES = get_setting("state", "typed_view_entries", 1024)
+
+def content_item(record):
+    fields = record['fields']
+    return ContentItem(record['id'], record.get('createdTime', 'N/A'), parse_timestamp(record.get('createdTime')),
+                       fields.get('ContentType'), fields.get('Status'), load_content_spec(fields))
+
+def resume_item(record):
+    fields = record['fields']
+    return Resume(record['id'], record.get('createdTime', 'N/A'), parse_timestamp(record.get('createdTime')),
+                  fields.get('Type'), fields.get('Status'), fields.get('OriginalFileName'))
+
+def build_content_items(records):
+    return [content_item(record) for record in records]
+
+def build_resumes(records):
+    return [resume_item(record) for record in records]
+
+def owned_by(record, email):
+    return email in (record['fields'].get('UserEmail') or "")
+
+@st.cache_resource
+def typed_views():
+    return TypedViewCache(TYPED_VIEW_ENTRIES)
+
+# Password hashing: self-describing "pbkdf2_sha256$<iterations>$<salt>$<hash>" format, run on a bounded worker pool
+PASSWORD_HASH_ALGORITHM = "pbkdf2_sha256"
+PASSWORD_HASH_ITERATIONS = get_setting("auth", "pbkdf2_iterations", 100000)
+PASSWORD_HASH_WORKERS = get_setting("auth", "hash_workers", 4)
+MAX_CONCURRENT_LOGINS = get_setting("auth", "max_concurrent_logins", 8)
+LOGIN_WAIT_SECONDS = get_setting("auth", "login_wait_seconds", 5)
+LEGACY_PASSWORD_ITERATIONS = 100000
+
+class LoginBusyError(Exception):
+    pass
+
+def hash_password(password, iterations=None):
+    iterations = iterations or PASSWORD_HASH_ITERATIONS
     salt = os.urandom(16)
-    hashed = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, 100000)
-    return base64.b64encode(salt + hashed).decode()
+    hashed = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations)
+    return f"{PASSWORD_HASH_ALGORITHM}${iterations}${base64.b64encode(salt).decode()}${base64.b64encode(hashed).decode()}"
+
+# Returns (algorithm, iterations, salt, hash); bare base64 is the original salt+hash format
+def parse_password_hash(stored_hash):
+    if "$" in stored_hash:
+        algorithm, iterations, salt, hashed = stored_hash.split("$")
+        return algorithm, int(iterations), base64.b64decode(salt), base64.b64decode(hashed)
+    decoded = base64.b64decode(stored_hash)
+    return PASSWORD_HASH_ALGORITHM, LEGACY_PASSWORD_ITERATIONS, decoded[:16], decoded[16:]
 
 def verify_password(stored_hash, password):
-    decoded = base64.b64decode(stored_hash)
-    salt, stored_hash = decoded[:16], decoded[16:]
-    hashed = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, 100000)
-    return hashed == stored_hash
+    try:
+        algorithm, iterations, salt, stored = parse_password_hash(stored_hash or "")
+    except ValueError:
+        return False
+    if algorithm != PASSWORD_HASH_ALGORITHM:
+        return False
+    hashed = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations)
+    return hmac.compare_digest(hashed, stored)
+
+def password_needs_rehash(stored_hash):
+    return "$" not in stored_hash or parse_password_hash(stored_hash)[1] != PASSWORD_HASH_ITERATIONS
+
+@st.cache_resource
+def get_password_hash_pool():
+    return ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"), threading.BoundedSemaphore(MAX_CONCURRENT_LOGINS)
 
-# Verify user
+# Runs fn off the script thread; raises LoginBusyError when too many logins are already in flight
+def run_password_job(fn, *args):
+    pool, login_slots = get_password_hash_pool()
+    if not login_slots.acquire(timeout=LOGIN_WAIT_SECONDS):
+        raise LoginBusyError("Too many concurrent logins")
+    try:
+        return pool.submit(fn, *args).result()
+    finally:
+        login_slots.release()
+
+# Quote a value for use inside an Airtable formula string
+def formula_string(value):
+    return "'" + str(value).replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+def normalize_email(email):
+    return (email or "").strip().lower()
+
+# Local index from normalized email to Users record id, kept current on signup and by modified-time delta syncs.
+# Syncs run on a background thread; a miss is checked with a single-email query instead of a sync.
+EMAIL_INDEX_SYNC_SECONDS = get_setting("email_index", "sync_seconds", 300)
+EMAIL_INDEX_FULL_SYNC_SECONDS = get_setting("email_index", "full_sync_seconds", 86400)
+
+class EmailIndex:
+    def __init__(self, name="email_index.db"):
+        self.name = name
+        self.lock = threading.Lock()
+        self.sync_running = threading.Lock()
+        with closing(local_db(self.name)) as conn, conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS email_index (email TEXT PRIMARY KEY, record_id TEXT NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def _meta(self, conn, key):
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def lookup(self, email):
+        with closing(local_db(self.name)) as conn:
+            row = conn.execute("SELECT record_id FROM email_index WHERE email = ?", (normalize_email(email),)).fetchone()
+        return row[0] if row else None
+
+    def add(self, email, record_id):
+        with closing(local_db(self.name)) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO email_index VALUES (?, ?)", (normalize_email(email), record_id))
+
+    def remove(self, email):
+        with closing(local_db(self.name)) as conn, conn:
+            conn.execute("DELETE FROM email_index WHERE email = ?", (normalize_email(email),))
+
+    # Full scan when the index is empty or old, otherwise only users modified since the last sync
+    def sync(self, force_full=False):
+        with self.lock:
+            with closing(local_db(self.name)) as conn:
+                last_sync = self._meta(conn, "last_sync")
+                last_full_sync = self._meta(conn, "last_full_sync")
+            started = datetime.now(timezone.utc)
+            full = force_full or not last_sync or not last_full_sync or \
+                (started - datetime.fromisoformat(last_full_sync)).total_seconds() > EMAIL_INDEX_FULL_SYNC_SECONDS
+            if full:
+                records = users_table.all(fields=["Email"])
+            else:
+                # Overlap the window so clock skew can't drop a change
+                since = (datetime.fromisoformat(last_sync) - timedelta(minutes=1)).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+                records = users_table.all(fields=["Email"], formula=f"IS_AFTER(LAST_MODIFIED_TIME(), {formula_string(since)})")
+            with closing(local_db(self.name)) as conn, conn:
+                if full:
+                    conn.execute("DELETE FROM email_index")
+                    conn.execute("INSERT OR REPLACE INTO meta VALUES ('last_full_sync', ?)", (started.isoformat(),))
+                conn.executemany("INSERT OR REPLACE INTO email_index VALUES (?, ?)", [
+                    (normalize_email(r['fields']['Email']), r['id']) for r in records if r['fields'].get('Email')
+                ])
+                conn.execute("INSERT OR REPLACE INTO meta VALUES ('last_sync', ?)", (started.isoformat(),))
+            logger.info(f"Email index {'full' if full else 'delta'} sync: {len(records)} record(s)")
+
+    # Starts a background sync when one is due; never blocks the caller
+    def maybe_sync(self):
+        with closing(local_db(self.name)) as conn:
+            last_sync = self._meta(conn, "last_sync")
+        if last_sync and (datetime.now(timezone.utc) - datetime.fromisoformat(last_sync)).total_seconds() <= EMAIL_INDEX_SYNC_SECONDS:
+            return
+        if not self.sync_running.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self.sync()
+            except Exception as e:
+                logger.error(f"Email index sync failed: {str(e)}")
+            finally:
+                self.sync_running.release()
+        threading.Thread(target=run, daemon=True, name="email-index-sync").start()
+
+    def fetch_one(self, email):
+        email = normalize_email(email)
+        records = users_table.all(fields=["Email"], formula=f"LOWER(TRIM({{Email}}))={formula_string(email)}", max_records=1)
+        return records[0]['id'] if records else None
+
+    # Misses (users created on another replica since the last sync, or new signups) cost one filtered query
+    def resolve(self, email):
+        self.maybe_sync()
+        record_id = self.lookup(email)
+        if record_id is None:
+            record_id = self.fetch_one(email)
+            if record_id:
+                self.add(email, record_id)
+        return record_id
+
+@st.cache_resource
+def get_email_index():
+    return EmailIndex()
+
+# Verify user, upgrading the stored hash when the cost setting has changed; returns (ok, user_id, stored email)
 def verify_user(email, password):
-    records = users_table.all(formula=f"{{Email}}='{email}'")
-    if records and verify_password(records[0]['fields'].get('Password'), password):
-        return True, records[0]['id']
-    return False, None
+    index = get_email_index()
+    record_id = index.resolve(email)
+    if record_id is None:
+        return False, None, None
+    try:
+        record = users_table.get(record_id)
+    except requests.HTTPError as e:
+        if e.response is not None and e.response.status_code == 404:
+            index.remove(email)
+            return False, None, None
+        raise
+    if normalize_email(record['fields'].get('Email')) != normalize_email(email):
+        # Email changed since the last sync
+        index.remove(email)
+        return False, None, None
+    stored_hash = record['fields'].get('Password', '')
+    if not run_password_job(verify_password, stored_hash, password):
+        return False, None, None
+    if password_needs_rehash(stored_hash):
+        try:
+            users_table.update(record_id, {"Password": run_password_job(hash_password, password)})
+        except Exception as e:
+            logger.error(f"Failed to upgrade password hash for {record_id}: {str(e)}")
+    return True, record_id, record['fields']['Email']
 
 # Create user
 def create_user(email, password):
-    if users_table.all(formula=f"{{Email}}='{email}'"):
+    email = normalize_email(email)
+    index = get_email_index()
+    if index.resolve(email):
         return False, "Email already exists"
-    users_table.create({
+    record = users_table.create({
         "Email": email,
-        "Password": hash_password(password),
+        "Password": run_password_job(hash_password, password),
         "Subscription": "Free",
         "Tokens": 10,
         "LastReset": datetime.now(timezone.utc).isoformat()
     })
+    index.add(email, record['id'])
     return True, "Account created"
 
-# Get subscription status (unchanged)
-def get_subscription_status(user_id):
-    record = users_table.get(user_id)
+# Get subscription status; callers that already hold the user record pass it in
+def get_subscription_status(user_id, record=None):
+    if record is None:
+        record = users_table.get(user_id)
     sub_status = record['fields'].get('Subscription', 'Free')
     sub_end = record['fields'].get('SubscriptionEnd')
     if sub_status == "Premium" and sub_end:
@@ -204,43 +1376,49 @@ def get_subscription_status(user_id):
             return "Free"
     return sub_status
 
-# Cached user data
-def get_user_data(user_id):
-    if 'user_data' not in st.session_state or st.session_state['user_data']['id'] != user_id:
-        record = users_table.get(user_id)
-        sub_status = get_subscription_status(user_id)
-        tokens = record['fields'].get('Tokens', 0)
-        last_reset = record['fields'].get('LastReset')
-        name = record['fields'].get('Name', '')
-        phone = record['fields'].get('Phone', '')
-        company_name = record['fields'].get('CompanyName', '')
-        website = record['fields'].get('Website', '')
-        
-        if last_reset:
-            try:
-                last_reset_date = datetime.fromisoformat(last_reset)
-                if last_reset_date.tzinfo is None:
-                    last_reset_date = last_reset_date.replace(tzinfo=timezone.utc)
-            except ValueError:
-                last_reset_date = datetime.strptime(last_reset, '%Y-%m-%d').replace(tzinfo=timezone.utc)
-            if datetime.now(timezone.utc) >= last_reset_date + relativedelta(months=1):
-                tokens = 10 if sub_status == "Free" else 100
-                users_table.update(user_id, {
-                    "Tokens": tokens,
-                    "LastReset": datetime.now(timezone.utc).isoformat()
-                })
-        st.session_state['user_data'] = {
-            'id': user_id,
-            'sub_status': sub_status,
-            'tokens': tokens,
-            'name': name,
-            'phone': phone,
-            'company_name': company_name,
-            'website': website
-        }
-    return (st.session_state['user_data']['sub_status'], st.session_state['user_data']['tokens'],
-            st.session_state['user_data']['name'], st.session_state['user_data']['phone'],
-            st.session_state['user_data']['company_name'], st.session_state['user_data']['website'])
+# User data cached in the shared state backend
+def load_user_data(user_id):
+    record = users_table.get(user_id)
+    sub_status = get_subscription_status(user_id, record)
+    tokens = record['fields'].get('Tokens', 0)
+    last_reset = record['fields'].get('LastReset')
+    name = record['fields'].get('Name', '')
+    phone = record['fields'].get('Phone', '')
+    company_name = record['fields'].get('CompanyName', '')
+    website = record['fields'].get('Website', '')
+
+    if last_reset:
+        try:
+            last_reset_date = datetime.fromisoformat(last_reset)
+            if last_reset_date.tzinfo is None:
+                last_reset_date = last_reset_date.replace(tzinfo=timezone.utc)
+        except ValueError:
+            last_reset_date = datetime.strptime(last_reset, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+        if datetime.now(timezone.utc) >= last_reset_date + relativedelta(months=1):
+            tokens = 10 if sub_status == "Free" else 100
+            users_table.update(user_id, {
+                "Tokens": tokens,
+                "LastReset": datetime.now(timezone.utc).isoformat()
+            })
+    return {
+        'id': user_id,
+        'sub_status': sub_status,
+        'tokens': tokens,
+        'name': name,
+        'phone': phone,
+        'company_name': company_name,
+        'website': website
+    }
+
+def get_user(user_id):
+    try:
+        return swr_get(user_cache_key(user_id), "users", lambda: load_user_data(user_id), USER_CACHE_TTL, "account", build=User.from_data)
+    except UpstreamUnavailable:
+        st.warning("Your account is temporarily unavailable. Please try again in a moment.")
+        st.stop()
+
+def update_cached_user_data(user_id, **changes):
+    shared_cache().update(user_cache_key(user_id), lambda entry: dict(entry, value=dict(entry["value"], **changes)), STALE_RETENTION_SECONDS)
 
 # Update subscription with logging
 def update_subscription(user_id, status, end_date=None):
@@ -249,40 +1427,162 @@ def update_subscription(user_id, status, end_date=None):
         fields["SubscriptionEnd"] = end_date.isoformat()
     try:
         users_table.update(user_id, fields)
-        if 'user_data' in st.session_state and st.session_state['user_data']['id'] == user_id:
-            st.session_state['user_data']['sub_status'] = status
+        update_cached_user_data(user_id, sub_status=status)
     except Exception as e:
         logger.error(f"Failed to update subscription for user_id {user_id}: {str(e)}")
         raise
 
 # Update tokens
+# Reads the balance from Airtable, not the cache: the backend deducts tokens there as jobs complete
 def update_tokens(user_id, token_change):
-    current_tokens = get_user_data(user_id)[1]
+    current_tokens = users_table.get(user_id)['fields'].get('Tokens', 0)
     new_tokens = max(0, current_tokens + token_change)
     users_table.update(user_id, {"Tokens": new_tokens})
-    if 'user_data' in st.session_state and st.session_state['user_data']['id'] == user_id:
-        st.session_state['user_data']['tokens'] = new_tokens
+    update_cached_user_data(user_id, tokens=new_tokens)
     return new_tokens
 
+# List views and usage stats only fetch the fields they show; heavy fields are loaded per record from the detail view
+CONTENT_LIST_FIELDS = ["ContentType", "Status", "Spec"]
+RESUME_LIST_FIELDS = ["OriginalFileName", "Type", "Status"]
+RECORD_CACHE_BYTES = get_setting("state", "record_cache_bytes", 32 * 1024 * 1024)
+# Records still being generated can change underneath us, finished ones rarely do
+ACTIVE_RECORD_TTL = get_setting("state", "active_record_ttl", 5)
+SETTLED_RECORD_TTL = get_setting("state", "settled_record_ttl", 300)
+
+# Per-record LRU bounded by the approximate serialized size of its entries
+class RecordCache:
+    def __init__(self, max_bytes=RECORD_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.size = 0
+
+    # Expired entries stay until evicted so peek() can still serve them
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if not entry or entry[2] < time.time():
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def peek(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            return entry[0] if entry else None
+
+    def put(self, key, record, ttl):
+        size = len(json.dumps(record, default=str))
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            self._drop(key)
+            self.entries[key] = (record, size, time.time() + ttl)
+            self.size += size
+            while self.size > self.max_bytes:
+                self._drop(next(iter(self.entries)))
+
+    def invalidate(self, key):
+        with self.lock:
+            self._drop(key)
+
+    def _drop(self, key):
+        entry = self.entries.pop(key, None)
+        if entry:
+            self.size -= entry[1]
+
+@st.cache_resource
+def record_cache():
+    return RecordCache()
+
+def record_ttl(record):
+    return SETTLED_RECORD_TTL if record['fields'].get('Status') in ["Completed", "Failed", "Cancelled", "Uploaded"] else ACTIVE_RECORD_TTL
+
+# Falls back to an expired cached copy when Airtable fails or its circuit is open
+def get_record_detail(table_name, table, record_id):
+    cache = record_cache()
+    record = cache.get((table_name, record_id))
+    if record is not None:
+        return record
+    try:
+        record = guarded(table_name, lambda: table.get(record_id))
+    except Exception:
+        record = cache.peek((table_name, record_id))
+        if record is None:
+            raise
+        note_stale("details")
+        return record
+    cache.put((table_name, record_id), record, record_ttl(record))
+    return record
+
+def get_content_detail(content_id):
+    return get_record_detail("content", content_table, content_id)
+
+def get_resume_detail(resume_id):
+    return get_record_detail("resumes", resumes_table, resume_id)
+
+def invalidate_content_detail(content_id):
+    record_cache().invalidate(("content", content_id))
+
+def invalidate_resume_detail(resume_id):
+    record_cache().invalidate(("resumes", resume_id))
+
+def records_by_id(table, record_ids, fields, chunk=50):
+    records = []
+    for start in range(0, len(record_ids), chunk):
+        formula = "OR(" + ", ".join(f"RECORD_ID()={formula_string(record_id)}" for record_id in record_ids[start:start + chunk]) + ")"
+        records.extend(table.all(formula=formula, fields=fields))
+    return records
+
+# Pre-Spec records keep their word count in Details, which the list fetch leaves out; their Spec is
+# derived once from Details and written back so later list loads and usage stats need nothing extra
+def backfill_specs(records):
+    legacy = [record for record in records if not record['fields'].get('Spec')]
+    if not legacy:
+        return records
+    details = {record['id']: record['fields'].get('Details', '') for record in
+               records_by_id(content_table, [record['id'] for record in legacy], ["Details"])}
+    updates = []
+    for record in legacy:
+        spec = dump_content_spec(load_content_spec(dict(record['fields'], Details=details.get(record['id'], ''))))
+        record['fields']['Spec'] = spec
+        updates.append({"id": record['id'], "fields": {"Spec": spec}})
+    try:
+        content_table.batch_update(updates)
+    except Exception as e:
+        logger.error(f"Failed to backfill Spec on {len(updates)} content record(s): {str(e)}")
+    return records
+
+def content_list_loader(user_email):
+    formula = f"{{UserEmail}}={formula_string(user_email)}"
+    return lambda: backfill_specs(content_table.all(formula=formula, fields=CONTENT_LIST_FIELDS))
+
+def resumes_list_loader(user_email):
+    formula = f"{{UserEmail}}={formula_string(user_email)}"
+    return lambda: resumes_table.all(formula=formula, fields=RESUME_LIST_FIELDS)
+
+# Content records per user, shared by the list views and usage stats
+def fetch_user_content_records(user_email):
+    return swr_get(content_cache_key(user_email), "content", content_list_loader(user_email), CONTENT_CACHE_TTL, "content", build=build_content_items)
+
 # Fetch user content using UserEmail
 def get_user_content(user_email, content_type_filter=None):
     try:
-        formula = f"{{UserEmail}}='{user_email}'"
-        all_user_content = content_table.all(formula=formula)
+        all_user_content = fetch_user_content_records(user_email)
 
         if content_type_filter:
             filtered_content = [
                 item for item in all_user_content
-                if item['fields'].get('ContentType') == content_type_filter
+                if item.content_type == content_type_filter
             ]
         else:
             filtered_content = all_user_content
 
-        if not filtered_content:
-            all_items = content_table.all()
-
         return filtered_content
 
+    except UpstreamUnavailable:
+        note_unavailable("content")
+        return []
     except Exception as e:
         logger.error(f"Error fetching/filtering user content for user {user_email}: {str(e)}", exc_info=True)
         return []
@@ -290,45 +1590,64 @@ def get_user_content(user_email, content_type_filter=None):
 # Fetch user resumes using UserEmail
 def get_user_resumes(user_email):
     try:
-        formula = f"{{UserEmail}}='{user_email}'"
-        items = resumes_table.all(formula=formula)
-        if not items:
-            all_items = resumes_table.all()
-        return items
+        return swr_get(resumes_cache_key(user_email), "resumes", resumes_list_loader(user_email), CONTENT_CACHE_TTL, "resumes", build=build_resumes)
+    except UpstreamUnavailable:
+        note_unavailable("resumes")
+        return []
     except Exception as e:
         logger.error(f"Error fetching resumes for user {user_email}: {str(e)}", exc_info=True)
         return []
 
 # Get usage stats with corrected formula
 def get_usage_stats(user_email, months_back=6):
-    formula = f"{{UserEmail}}='{user_email}'"
-    records = content_table.all(formula=formula)
+    items = fetch_user_content_records(user_email)
     current_date = datetime.now(timezone.utc)
     stats = {i: {"Blog Post": 0, "SEO Article": 0, "Social Media Post": 0, "Tokens Used": 0} 
              for i in range(months_back + 1)}
     start_date = current_date - relativedelta(months=months_back)
     
-    for record in records:
-        created_time = datetime.fromisoformat(record['createdTime']).replace(tzinfo=timezone.utc)
-        if record['fields'].get('Status') == "Completed" and created_time >= start_date:
+    for item in items:
+        created_time = item.created
+        if item.status == "Completed" and created_time and created_time >= start_date:
             months_ago = (current_date.year - created_time.year) * 12 + current_date.month - created_time.month
             if 0 <= months_ago <= months_back:
-                content_type = record['fields'].get('ContentType', 'Unknown')
+                content_type = item.content_type
                 if content_type in TOKEN_COSTS:
                     stats[months_ago][content_type] += 1
-                    details = record['fields'].get('Details', '')
-                    word_count = 500
-                    if 'word_count' in details:
-                        try:
-                            word_count = int(details.split('word_count')[1].split('}')[0].split(':')[1])
-                        except:
-                            pass
-                    if callable(TOKEN_COSTS[content_type]):
-                        stats[months_ago]["Tokens Used"] += TOKEN_COSTS[content_type](word_count)
-                    else:
-                        stats[months_ago]["Tokens Used"] += TOKEN_COSTS[content_type]
+                    stats[months_ago]["Tokens Used"] += token_cost_for(content_type, item.spec.get("word_count"))
     return stats
 
+# Session warm-up: the user record, content list and resumes are fetched side by side after login so the
+# first page renders at the cost of the slowest call. Workers only fill the shared cache, never session state;
+# usage stats are computed from the warmed content list.
+WARMUP_WORKERS = get_setting("state", "warmup_workers", 3)
+WARMUP_WAIT_SECONDS = get_setting("state", "warmup_wait_seconds", 5)
+
+@st.cache_resource
+def get_warmup_pool():
+    return ThreadPoolExecutor(max_workers=WARMUP_WORKERS, thread_name_prefix="session-warmup")
+
+def warm_entry(key, table_name, loader, fresh_ttl):
+    entry = shared_cache().get(key)
+    if entry is not None and time.time() - entry["fetched_at"] <= fresh_ttl:
+        return
+    load_entry(key, table_name, loader)
+
+def warm_session(user_id, user_email):
+    jobs = {
+        "account": (user_cache_key(user_id), "users", lambda: load_user_data(user_id), USER_CACHE_TTL),
+        "content": (content_cache_key(user_email), "content", content_list_loader(user_email), CONTENT_CACHE_TTL),
+        "resumes": (resumes_cache_key(user_email), "resumes", resumes_list_loader(user_email), CONTENT_CACHE_TTL),
+    }
+    pool = get_warmup_pool()
+    futures = {pool.submit(warm_entry, *job): label for label, job in jobs.items()}
+    done, pending = wait(futures, timeout=WARMUP_WAIT_SECONDS)
+    for future in done:
+        if future.exception() is not None:
+            logger.warning(f"Session warm-up of {futures[future]} failed: {str(future.exception())}")
+    if pending:
+        logger.info(f"Session warm-up still running for {sorted(futures[f] for f in pending)} after {WARMUP_WAIT_SECONDS}s")
+
 # Fixed file upload response handling
 def upload_file_to_airtable(base_id, record_id, field_name, file_content, file_name, content_type):
     url = f"https://content.airtable.com/v0/{base_id}/{record_id}/{field_name}/uploadAttachment"
@@ -342,7 +1661,7 @@ def upload_file_to_airtable(base_id, record_id, field_name, file_content, file_n
         "filename": file_name
     }
     try:
-        response = requests.post(url, headers=headers, json=payload)
+        response = airtable_session().post(url, headers=headers, json=payload)
         response.raise_for_status()
         response_data = response.json()
         if "fields" in response_data:
@@ -357,6 +1676,741 @@ def upload_file_to_airtable(base_id, record_id, field_name, file_content, file_n
         st.error(f"Invalid response from Airtable: {str(e)}")
         raise
 
+# Resume ingestion: parsed once at upload and stored as JSON in the "Parsed" field
+RESUME_SCHEMA_VERSION = 1
+RESUME_SECTION_HEADINGS = {
+    "summary": ["summary", "profile", "objective", "about me", "professional summary"],
+    "experience": ["experience", "work experience", "professional experience", "employment", "employment history", "work history"],
+    "education": ["education", "academic background", "qualifications"],
+    "skills": ["skills", "technical skills", "core competencies", "competencies"],
+    "projects": ["projects", "selected projects"],
+    "certifications": ["certifications", "certificates", "licenses"]
+}
+RESUME_HEADING_LOOKUP = {alias: section for section, aliases in RESUME_SECTION_HEADINGS.items() for alias in aliases}
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+PHONE_RE = re.compile(r"\+?\d[\d\s().-]{7,}\d")
+LINK_RE = re.compile(r"(?:https?://|www\.)\S+|linkedin\.com/\S+|github\.com/\S+")
+
+def extract_resume_text(file_content, file_name):
+    if file_name.lower().endswith(".pdf"):
+        with pdfplumber.open(io.BytesIO(file_content)) as pdf:
+            return "\n".join(page.extract_text() or "" for page in pdf.pages)
+    return file_content.decode("utf-8", errors="replace")
+
+def segment_resume(text):
+    sections = {}
+    header_lines = []
+    current = None
+    for line in text.splitlines():
+        stripped = line.strip()
+        key = stripped.rstrip(":").lower()
+        if key in RESUME_HEADING_LOOKUP and len(stripped) <= 40:
+            current = RESUME_HEADING_LOOKUP[key]
+            sections.setdefault(current, [])
+        elif current:
+            sections[current].append(line)
+        elif stripped:
+            header_lines.append(stripped)
+    header = "\n".join(header_lines)
+    return {
+        "contact": {
+            "lines": header_lines,
+            "emails": EMAIL_RE.findall(header),
+            "phones": [p.strip() for p in PHONE_RE.findall(header)],
+            "links": LINK_RE.findall(header)
+        },
+        "sections": {name: "\n".join(lines).strip() for name, lines in sections.items()}
+    }
+
+def parse_resume(file_content, file_name):
+    text = extract_resume_text(file_content, file_name)
+    return dict(segment_resume(text), schema_version=RESUME_SCHEMA_VERSION, text=text)
+
+# Uses the stored representation; older records are parsed once from the attachment and backfilled
+def load_parsed_resume(resume_id, fields):
+    if fields.get('Parsed'):
+        try:
+            return json.loads(fields['Parsed'])
+        except ValueError as e:
+            logger.warning(f"Invalid Parsed field on resume {resume_id}: {str(e)}")
+    if not fields.get('File'):
+        return None
+    file_name = fields.get('OriginalFileName', '')
+    if not file_name.lower().endswith((".pdf", ".txt")):
+        return None
+    response = outbound_session().get(fields['File'][0]['url'])
+    response.raise_for_status()
+    parsed = parse_resume(response.content, file_name)
+    try:
+        resumes_table.update(resume_id, {"Parsed": json.dumps(parsed)})
+        invalidate_resume_detail(resume_id)
+    except Exception as e:
+        logger.error(f"Failed to backfill Parsed for resume {resume_id}: {str(e)}")
+    return parsed
+
+def request_resume_enhancement(user_id, item, parsed, enhancement_type, job_url=None):
+    record = {
+        "UserID": [user_id],
+        "OriginalFileName": item.file_name,
+        "Type": enhancement_type,
+        "Status": "Requested",
+        "Parsed": json.dumps(parsed)
+    }
+    if job_url:
+        record["JobTargetURL"] = job_url
+    new_record = resumes_table.create(record)
+    invalidate_user_resumes(st.session_state['user_email'])
+
+    # Send webhook with token cost and the pre-parsed resume
+    payload = {
+        "user_id": user_id,
+        "content_type": "Resume Enhancement",
+        "details": enhancement_type,
+        "content_record_id": new_record['id'],
+        "source_record_id": item.id,
+        "token_cost": TOKEN_COSTS["Resume Enhancement"],
+        "resume": parsed
+    }
+    if job_url:
+        payload["job_url"] = job_url  # Keep job_url separate from content_details
+    webhook_url = st.secrets["make"]["resume_webhook_url"]
+    return outbound_session().post(webhook_url, json=payload)
+
+# Admin analytics: periodically refreshed columnar snapshot of the content and users tables
+ADMIN_EMAILS = [e.lower() for e in get_setting("admin", "emails", [])]
+ANALYTICS_SNAPSHOT_TTL = get_setting("admin", "snapshot_ttl", 300)
+ANALYTICS_PERIODS = [7, 30, 90, 365]
+
+def is_admin(user_email):
+    return (user_email or "").lower() in ADMIN_EMAILS
+
+def first_value(value):
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+# Rows without Spec keep their word count in Details, as in load_content_spec. Details is read (never written)
+# only for such rows young enough to show up in a period, once per process: legacy rows are not edited in place.
+def legacy_word_counts(content_records, known):
+    since = (datetime.now(timezone.utc) - timedelta(days=max(ANALYTICS_PERIODS))).isoformat()
+    missing = [r['id'] for r in content_records
+               if not r['fields'].get('Spec') and r['id'] not in known and r['createdTime'] >= since]
+    for record in records_by_id(content_table, missing, ["Details"]) if missing else []:
+        known[record['id']] = load_content_spec(record['fields']).get("word_count")
+    return [known.get(r['id']) for r in content_records]
+
+def load_analytics_snapshot(known_word_counts):
+    content_records = content_table.all(fields=["UserEmail", "ContentType", "Status", "Spec"])
+    content_df = pd.DataFrame({
+        "created": pd.to_datetime(pd.Series([r['createdTime'] for r in content_records], dtype="string"), utc=True),
+        "email": pd.Series([first_value(r['fields'].get('UserEmail')) for r in content_records], dtype="string").str.lower(),
+        "content_type": pd.Series([r['fields'].get('ContentType', 'Unknown') for r in content_records], dtype="category"),
+        "status": pd.Series([r['fields'].get('Status', 'N/A') for r in content_records], dtype="category")
+    })
+    spec_word_counts = pd.Series([r['fields'].get('Spec', '') for r in content_records], dtype="string").str.extract(r'"word_count":\s*(\d+)')[0]
+    content_df["word_count"] = pd.to_numeric(spec_word_counts, errors="coerce").fillna(
+        pd.Series(legacy_word_counts(content_records, known_word_counts), dtype="Float64")
+    ).fillna(500).astype(np.int32)
+
+    user_records = users_table.all(fields=["Email", "Subscription"])
+    users_df = pd.DataFrame({
+        "email": pd.Series([(r['fields'].get('Email') or '').lower() for r in user_records], dtype="string"),
+        "plan": pd.Series([r['fields'].get('Subscription', 'Free') for r in user_records], dtype="category")
+    }).drop_duplicates("email")
+    return content_df, users_df, datetime.now(timezone.utc)
+
+class AnalyticsSnapshot:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.value = None
+        self.error = None
+        self.refreshed_at = 0
+        self.refreshing = False
+        self.word_counts = {}
+
+    def refresh(self):
+        try:
+            value = load_analytics_snapshot(self.word_counts)
+            with self.lock:
+                self.value = value
+                self.error = None
+        except Exception as e:
+            logger.error(f"Failed to refresh analytics snapshot: {str(e)}", exc_info=True)
+            with self.lock:
+                self.error = str(e)
+        finally:
+            with self.lock:
+                self.refreshing = False
+
+@st.cache_resource
+def get_analytics_snapshot():
+    return AnalyticsSnapshot()
+
+# Refreshes run on a background thread; the admin page keeps showing the last snapshot meanwhile
+def analytics_snapshot(force=False):
+    holder = get_analytics_snapshot()
+    with holder.lock:
+        due = not holder.refreshing and (force or time.time() - holder.refreshed_at > ANALYTICS_SNAPSHOT_TTL)
+        if due:
+            holder.refreshing = True
+            holder.refreshed_at = time.time()
+    if due:
+        threading.Thread(target=holder.refresh, daemon=True, name="analytics-snapshot").start()
+    with holder.lock:
+        return holder.value, holder.refreshing, holder.error
+
+# Vectorized counterpart of token_cost_for
+def token_costs_vectorized(content_types, word_counts):
+    content_types = np.asarray(content_types, dtype=object)
+    per_word = np.maximum(1, np.asarray(word_counts) // 500)
+    conditions = [np.isin(content_types, ["Blog Post", "SEO Article"])]
+    choices = [per_word]
+    for content_type, cost in TOKEN_COSTS.items():
+        if not callable(cost):
+            conditions.append(content_types == content_type)
+            choices.append(np.full(len(content_types), cost))
+    return np.select(conditions, choices, default=0)
+
+def compute_analytics(content_df, users_df, days_back=90):
+    since = pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=days_back)
+    recent = content_df[content_df["created"] >= since].copy()
+    recent["day"] = recent["created"].dt.floor("D")
+    recent["tokens"] = np.where(
+        recent["status"].astype(str) == "Completed",
+        token_costs_vectorized(recent["content_type"].astype(str), recent["word_count"]),
+        0
+    )
+    recent = recent.merge(users_df, on="email", how="left")
+    # Content from users missing in the Users table still counts, under "Unknown"
+    recent["plan"] = recent["plan"].astype(object).fillna("Unknown")
+
+    tokens_per_day = recent.groupby(["day", "plan"], observed=True)["tokens"].sum().reset_index()
+    content_mix = recent.groupby("content_type", observed=True).size().rename("count").reset_index()
+    status_rates = pd.crosstab(recent["content_type"], recent["status"], normalize="index").reset_index()
+    plan_usage = recent.groupby("plan", observed=True).agg(
+        requests=("status", "size"),
+        tokens=("tokens", "sum"),
+        active_users=("email", "nunique")
+    ).reset_index()
+    plan_users = users_df.groupby("plan", observed=True).size().rename("users").reset_index()
+    plan_usage = plan_usage.merge(plan_users, on="plan", how="outer").fillna(0)
+    return {
+        "tokens_per_day": tokens_per_day,
+        "content_mix": content_mix,
+        "status_rates": status_rates,
+        "plan_usage": plan_usage,
+        "totals": {
+            "requests": len(recent),
+            "tokens": int(recent["tokens"].sum()),
+            "failure_rate": float((recent["status"].astype(str) == "Failed").mean()) if len(recent) else 0.0,
+            "cancel_rate": float((recent["status"].astype(str) == "Cancelled").mean()) if len(recent) else 0.0
+        }
+    }
+
+# Archival tier: old completed Outputs move into compressed segment files on a shared volume, leaving an "Archived"
+# stub in Airtable whose "ArchiveRef" says where the text is. Archival only runs when archive.directory is set, and it
+# must be a durable mount every replica can read: the segment is the only copy once the stub is written.
+ARCHIVE_ENABLED = get_setting("archive", "enabled", False)
+ARCHIVE_DIRECTORY = get_setting("archive", "directory")
+ARCHIVE_MAX_AGE_DAYS = get_setting("archive", "max_age_days", 180)
+ARCHIVE_RUN_SECONDS = get_setting("archive", "run_seconds", 3600)
+ARCHIVE_SEGMENT_BYTES = get_setting("archive", "segment_bytes", 64 * 1024 * 1024)
+ARCHIVE_CACHE_ENTRIES = get_setting("archive", "cache_entries", 256)
+ARCHIVE_BATCH_SIZE = 100
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+def compress_output(text):
+    if zstandard:
+        return "zstd", zstandard.ZstdCompressor(level=10).compress(text.encode())
+    return "gzip", gzip.compress(text.encode(), compresslevel=9)
+
+def decompress_output(codec, blob):
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor().decompress(blob).decode()
+    return gzip.decompress(blob).decode()
+
+class ContentArchive:
+    def __init__(self, directory):
+        self.directory = directory
+        # Replicas append to their own segments, so offsets never race on the shared volume
+        self.writer = uuid.uuid4().hex[:12]
+        self.lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _current_segment(self):
+        prefix = f"segment-{self.writer}-"
+        segments = sorted(f for f in os.listdir(self.directory) if f.startswith(prefix))
+        if segments and os.path.getsize(os.path.join(self.directory, segments[-1])) < ARCHIVE_SEGMENT_BYTES:
+            return segments[-1]
+        return f"{prefix}{len(segments) + 1:06d}.bin"
+
+    # Each entry is compressed on its own so it can be read back with one seek; returns the ArchiveRef to store
+    def put(self, text):
+        codec, blob = compress_output(text)
+        with self.lock:
+            segment = self._current_segment()
+            with open(os.path.join(self.directory, segment), "ab") as f:
+                offset = f.tell()
+                f.write(blob)
+                f.flush()
+                os.fsync(f.fileno())
+        return {"segment": segment, "offset": offset, "length": len(blob), "codec": codec,
+                "sha256": hashlib.sha256(text.encode()).hexdigest()}
+
+    def get(self, ref):
+        try:
+            with open(os.path.join(self.directory, ref["segment"]), "rb") as f:
+                f.seek(ref["offset"])
+                text = decompress_output(ref["codec"], f.read(ref["length"]))
+        except (OSError, ValueError, EOFError, zlib.error) as e:
+            raise ArchiveUnavailable(f"Segment {ref['segment']} unreadable: {str(e)}")
+        if hashlib.sha256(text.encode()).hexdigest() != ref["sha256"]:
+            raise ArchiveUnavailable(f"Checksum mismatch in segment {ref['segment']}")
+        return text
+
+@st.cache_resource
+def get_content_archive():
+    return ContentArchive(ARCHIVE_DIRECTORY) if ARCHIVE_DIRECTORY else None
+
+# The ref is unique per archival, so a re-archived record is not served stale
+@st.cache_data(max_entries=ARCHIVE_CACHE_ENTRIES, show_spinner=False)
+def rehydrate_output(archive_ref):
+    archive = get_content_archive()
+    if archive is None:
+        raise ArchiveUnavailable("archive.directory is not configured")
+    return archive.get(json.loads(archive_ref))
+
+def rehydrate_archived(content_id, fields):
+    if not fields.get('Archived'):
+        return fields
+    try:
+        if not fields.get('ArchiveRef'):
+            raise ArchiveUnavailable("record has no ArchiveRef")
+        return dict(fields, Output=rehydrate_output(fields['ArchiveRef']))
+    except (ArchiveUnavailable, ValueError, KeyError) as e:
+        logger.error(f"Archived output unavailable for {content_id}: {str(e)}")
+        return fields
+
+# An archived stub whose text could not be read back; every write path must stay disabled for it
+def archive_unavailable(fields):
+    return bool(fields.get('Archived')) and not fields.get('Output')
+
+def archive_old_content():
+    archive = get_content_archive()
+    if archive is None:
+        logger.error("Content archival is enabled but archive.directory is not set; refusing to archive")
+        return
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=ARCHIVE_MAX_AGE_DAYS)).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+    formula = f"AND({{Status}}='Completed', NOT({{Archived}}), LEN({{Output}}) > 0, IS_BEFORE(CREATED_TIME(), {formula_string(cutoff)}))"
+    archived = 0
+    while True:
+        # Archived records drop out of the formula, so each batch is a fresh query
+        batch = content_table.all(formula=formula, fields=["Output"], max_records=ARCHIVE_BATCH_SIZE)
+        if not batch:
+            break
+        archived_at = datetime.now(timezone.utc).isoformat()
+        stubs = []
+        # Only records whose segment reads back intact lose their Airtable copy
+        for record in batch:
+            output = record['fields']['Output']
+            ref = archive.put(output)
+            if archive.get(ref) != output:
+                raise ArchiveUnavailable(f"Read-back of {record['id']} did not match")
+            stubs.append({"id": record['id'], "fields": {"Output": "", "Archived": True, "ArchivedAt": archived_at,
+                                                         "ArchiveRef": json.dumps(ref)}})
+        content_table.batch_update(stubs)
+        archived += len(stubs)
+    logger.info(f"Archived {archived} content output(s) older than {ARCHIVE_MAX_AGE_DAYS} days")
+
+@st.cache_resource
+def get_archive_schedule():
+    return {"lock": threading.Lock(), "last_run": 0}
+
+# Starts a background archival pass at most once per ARCHIVE_RUN_SECONDS per process
+def maybe_archive_old_content():
+    if not ARCHIVE_ENABLED:
+        return
+    schedule = get_archive_schedule()
+    if time.time() - schedule["last_run"] < ARCHIVE_RUN_SECONDS or not schedule["lock"].acquire(blocking=False):
+        return
+    schedule["last_run"] = time.time()
+
+    def run():
+        try:
+            archive_old_content()
+        except Exception as e:
+            logger.error(f"Content archival failed: {str(e)}", exc_info=True)
+        finally:
+            schedule["lock"].release()
+    threading.Thread(target=run, daemon=True, name="content-archival").start()
+
+# Speculative prefetch: warm the detail cache for the first visible cards of a list page
+PREFETCH_ENABLED = get_setting("prefetch", "enabled", True)
+PREFETCH_TOP_N = get_setting("prefetch", "top_n", 5)
+PREFETCH_WORKERS = get_setting("prefetch", "workers", 2)
+# Leave this many rate-limit tokens for foreground requests
+PREFETCH_RESERVE_TOKENS = get_setting("prefetch", "reserve_tokens", 2)
+# Share of the record cache budget prefetched entries may fill
+PREFETCH_MEMORY_SHARE = get_setting("prefetch", "memory_share", 0.5)
+
+class Prefetcher:
+    def __init__(self, workers=PREFETCH_WORKERS):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        self.lock = threading.Lock()
+        self.in_flight = set()
+
+    def submit(self, kind, record_ids):
+        cache = record_cache()
+        for record_id in record_ids[:PREFETCH_TOP_N]:
+            key = (kind, record_id)
+            if cache.size > cache.max_bytes * PREFETCH_MEMORY_SHARE:
+                return
+            with self.lock:
+                if key in self.in_flight or cache.get(key) is not None:
+                    continue
+                self.in_flight.add(key)
+            self.pool.submit(self._fetch, kind, record_id)
+
+    def _fetch(self, kind, record_id):
+        # Drop rather than queue when the budget is tight; the click will fetch it anyway
+        try:
+            with airtable_policy(PREFETCH_RESERVE_TOKENS, 0):
+                table = content_table if kind == "content" else resumes_table
+                record = table.get(record_id)
+                record_cache().put((kind, record_id), record, record_ttl(record))
+                if kind == "resumes" and not record['fields'].get('Parsed'):
+                    # Older uploads: parse the attachment now and backfill
+                    parsed = load_parsed_resume(record_id, record['fields'])
+                    if parsed:
+                        record = dict(record, fields=dict(record['fields'], Parsed=json.dumps(parsed)))
+                        record_cache().put((kind, record_id), record, record_ttl(record))
+        except Exception as e:
+            logger.debug(f"Prefetch of {kind} {record_id} failed: {str(e)}")
+        finally:
+            with self.lock:
+                self.in_flight.discard((kind, record_id))
+
+@st.cache_resource
+def get_prefetcher():
+    return Prefetcher()
+
+def prefetch_details(kind, items):
+    if PREFETCH_ENABLED and items:
+        get_prefetcher().submit(kind, [item.id for item in items])
+
+# Version history: each edit is a line diff against the previous version, with a full snapshot every few versions
+VERSION_SNAPSHOT_INTERVAL = get_setting("history", "snapshot_interval", 10)
+
+def diff_lines(previous, current):
+    previous_lines = previous.splitlines(keepends=True)
+    current_lines = current.splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(a=previous_lines, b=current_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append(["c", i1, i2])
+        elif j2 > j1:
+            ops.append(["i", current_lines[j1:j2]])
+    return ops
+
+def apply_line_diff(previous, ops):
+    previous_lines = previous.splitlines(keepends=True)
+    parts = []
+    for op in ops:
+        parts.extend(previous_lines[op[1]:op[2]] if op[0] == "c" else op[1])
+    return "".join(parts)
+
+class ContentVersionStore:
+    def __init__(self, name="content_versions.db"):
+        self.name = name
+        self.lock = threading.Lock()
+        with closing(local_db(self.name)) as conn, conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS content_versions (
+                record_id TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                data BLOB NOT NULL,
+                details TEXT,
+                note TEXT,
+                created TEXT NOT NULL,
+                PRIMARY KEY (record_id, version))""")
+
+    # Replays at most snapshot_interval - 1 diffs on top of the nearest snapshot
+    def get(self, record_id, version):
+        with closing(local_db(self.name)) as conn:
+            snapshot = conn.execute(
+                "SELECT version FROM content_versions WHERE record_id = ? AND version <= ? AND kind = 'snapshot' ORDER BY version DESC LIMIT 1",
+                (record_id, version)).fetchone()
+            if not snapshot:
+                return None
+            rows = conn.execute(
+                "SELECT kind, data, details FROM content_versions WHERE record_id = ? AND version BETWEEN ? AND ? ORDER BY version",
+                (record_id, snapshot[0], version)).fetchall()
+        text, details = "", ""
+        for kind, data, details in rows:
+            payload = json.loads(zlib.decompress(data))
+            text = payload if kind == "snapshot" else apply_line_diff(text, payload)
+        return {"output": text, "details": details}
+
+    def versions(self, record_id):
+        with closing(local_db(self.name)) as conn:
+            rows = conn.execute(
+                "SELECT version, note, created, kind, length(data) FROM content_versions WHERE record_id = ? ORDER BY version DESC",
+                (record_id,)).fetchall()
+        return [{"version": v, "note": note, "created": created, "kind": kind, "bytes": size} for v, note, created, kind, size in rows]
+
+    def latest_version(self, record_id):
+        with closing(local_db(self.name)) as conn:
+            row = conn.execute("SELECT MAX(version) FROM content_versions WHERE record_id = ?", (record_id,)).fetchone()
+        return row[0] or 0
+
+    # Returns the new version number, or None when nothing changed
+    def add(self, record_id, output, details, note):
+        with self.lock:
+            latest = self.latest_version(record_id)
+            previous = self.get(record_id, latest) if latest else None
+            if previous and previous["output"] == output and previous["details"] == details:
+                return None
+            version = latest + 1
+            if previous is None or (version - 1) % VERSION_SNAPSHOT_INTERVAL == 0:
+                kind, payload = "snapshot", output
+            else:
+                kind, payload = "delta", diff_lines(previous["output"], output)
+            with closing(local_db(self.name)) as conn, conn:
+                conn.execute("INSERT INTO content_versions VALUES (?, ?, ?, ?, ?, ?, ?)", (
+                    record_id, version, kind, zlib.compress(json.dumps(payload).encode()),
+                    details, note, datetime.now(timezone.utc).isoformat()))
+            return version
+
+@st.cache_resource
+def get_version_store():
+    return ContentVersionStore()
+
+# True when the record holds output that is not the latest stored version (e.g. a finished regeneration)
+def output_has_changed(content_id, fields):
+    store = get_version_store()
+    latest = store.latest_version(content_id)
+    if not latest or not fields.get('Output'):
+        return False
+    return store.get(content_id, latest)["output"] != fields['Output']
+
+# Keeps the version before an edit, so the first edit of a record still has something to restore
+def record_versions(content_id, fields, output, details, note):
+    store = get_version_store()
+    if fields.get('Output') and not store.latest_version(content_id):
+        store.add(content_id, fields['Output'], fields.get('Details', ''), "Generated")
+    if output:
+        store.add(content_id, output, details, note)
+
+# Pipeline latency: HDR-style log-linear histograms of queue and generation time
+class LatencyHistogram:
+    __slots__ = ("sub_bucket_bits", "counts", "total")
+
+    def __init__(self, sub_bucket_bits=6):
+        # Relative error is bounded by 1 / 2**sub_bucket_bits
+        self.sub_bucket_bits = sub_bucket_bits
+        self.counts = {}
+        self.total = 0
+
+    def _index(self, value):
+        value = max(0, int(value))
+        shift = value.bit_length() - 1 - self.sub_bucket_bits
+        if shift < 0:
+            return value
+        return (shift << self.sub_bucket_bits) + (value >> shift)
+
+    def _value_at(self, index):
+        sub_buckets = 1 << self.sub_bucket_bits
+        if index < 2 * sub_buckets:
+            return index
+        shift = (index >> self.sub_bucket_bits) - 1
+        mantissa = index - (shift << self.sub_bucket_bits)
+        return (mantissa << shift) + (1 << shift) // 2
+
+    def record(self, value, count=1):
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.total += count
+
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+
+    def percentile(self, q):
+        if not self.total:
+            return None
+        target = max(1, math.ceil(self.total * q / 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return self._value_at(index)
+
+LATENCY_STAGES = {
+    "queue": ("Requested", "In Progress"),
+    "generation": ("In Progress", "Completed"),
+    "total": ("Requested", "Completed")
+}
+LATENCY_REFRESH_SECONDS = get_setting("latency", "refresh_seconds", 600)
+# Each refresh re-reads records completed this long before the newest one seen, in case they landed late
+LATENCY_OVERLAP_SECONDS = 300
+LATENCY_MIN_SAMPLES = get_setting("latency", "min_samples", 20)
+
+def parse_timestamp(value):
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def latency_keys(fields):
+    content_type = fields.get('ContentType', 'Unknown')
+    word_count = load_content_spec(fields).get("word_count")
+    plan = fields.get('Plan') or "Unknown"
+    # Most specific first; coarser keys back up the ETA when samples are thin
+    return [(content_type, word_count, plan), (content_type, word_count, None), (content_type, None, None)]
+
+# Histograms per (content type, word count, plan) and stage, in seconds. The first refresh reads every completed
+# record; later ones only read records completed since and merge them in.
+class LatencyRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.refreshed_at = 0
+        self.refreshing = False
+        self.watermark = None
+        # record id -> CompletedAt for records inside the overlap window, so a re-read does not count them twice
+        self.recent = {}
+
+    def observe(self, fields):
+        for stage, (start_status, end_status) in LATENCY_STAGES.items():
+            start = parse_timestamp(fields.get(STATUS_TIMESTAMP_FIELDS[start_status]))
+            end = parse_timestamp(fields.get(STATUS_TIMESTAMP_FIELDS[end_status]))
+            if start and end and end >= start:
+                seconds = (end - start).total_seconds()
+                with self.lock:
+                    for key in latency_keys(fields):
+                        self.histograms.setdefault((key, stage), LatencyHistogram()).record(seconds)
+
+    # A record completed again (a regeneration) has a new CompletedAt and counts as a new sample
+    def merge_completed(self, records):
+        recent = dict(self.recent)
+        for record in records:
+            completed_at = record['fields'].get('CompletedAt')
+            if not completed_at or recent.get(record['id']) == completed_at:
+                continue
+            self.observe(record['fields'])
+            recent[record['id']] = completed_at
+        if recent:
+            watermark = max(parse_timestamp(completed_at) for completed_at in recent.values())
+            cutoff = watermark - timedelta(seconds=LATENCY_OVERLAP_SECONDS)
+            self.recent = {record_id: completed_at for record_id, completed_at in recent.items()
+                           if parse_timestamp(completed_at) >= cutoff}
+            self.watermark = watermark
+
+    def completed_since_formula(self):
+        if self.watermark is None:
+            return "{CompletedAt}"
+        since = (self.watermark - timedelta(seconds=LATENCY_OVERLAP_SECONDS)).isoformat()
+        return f"AND({{CompletedAt}}, NOT(IS_BEFORE({{CompletedAt}}, {formula_string(since)})))"
+
+    def percentiles(self, key, stage, quantiles=(50, 95, 99)):
+        with self.lock:
+            histogram = self.histograms.get((key, stage))
+            if not histogram:
+                return None
+            return {q: histogram.percentile(q) for q in quantiles}, histogram.total
+
+    def snapshot(self):
+        with self.lock:
+            items = list(self.histograms.items())
+        rows = []
+        for ((content_type, word_count, plan), stage), histogram in items:
+            rows.append({
+                "content_type": content_type,
+                "word_count": word_count or "all",
+                "plan": plan or "all",
+                "stage": stage,
+                "samples": histogram.total,
+                "p50_s": histogram.percentile(50),
+                "p95_s": histogram.percentile(95),
+                "p99_s": histogram.percentile(99)
+            })
+        return rows
+
+@st.cache_resource
+def get_latency_registry():
+    return LatencyRegistry()
+
+def refresh_latency_histograms(registry):
+    try:
+        timestamp_fields = ["ContentType", "Plan", "Spec"] + list(STATUS_TIMESTAMP_FIELDS.values())
+        registry.merge_completed(content_table.all(fields=timestamp_fields, formula=registry.completed_since_formula()))
+    except Exception as e:
+        logger.error(f"Failed to refresh latency histograms: {str(e)}")
+    finally:
+        with registry.lock:
+            registry.refreshing = False
+
+# Refreshes run on a background thread, one at a time; until the first one lands the ETA is simply not shown
+def latency_registry():
+    registry = get_latency_registry()
+    with registry.lock:
+        due = not registry.refreshing and time.time() - registry.refreshed_at > LATENCY_REFRESH_SECONDS
+        if due:
+            registry.refreshing = True
+            registry.refreshed_at = time.time()
+    if due:
+        threading.Thread(target=refresh_latency_histograms, args=(registry,), daemon=True, name="latency-refresh").start()
+    return registry
+
+# Backend-set statuses without a timestamp get the time we first saw them
+def stamp_observed_transition(content_id, fields):
+    status = fields.get('Status')
+    timestamp_field = STATUS_TIMESTAMP_FIELDS.get(status)
+    if not timestamp_field:
+        return fields
+    stamped = parse_timestamp(fields.get(timestamp_field))
+    requested = parse_timestamp(fields.get('RequestedAt'))
+    # A stamp older than the latest request belongs to an earlier run
+    if stamped and (status == "Requested" or not requested or stamped >= requested):
+        return fields
+    update = status_fields(status)
+    try:
+        content_table.update(content_id, update)
+        invalidate_content_detail(content_id)
+    except Exception as e:
+        logger.error(f"Failed to stamp {status} on {content_id}: {str(e)}")
+        return fields
+    # The next refresh picks up a stamped CompletedAt like any other
+    return dict(fields, **update)
+
+def estimate_remaining_seconds(fields):
+    registry = latency_registry()
+    now = datetime.now(timezone.utc)
+    status = fields.get('Status')
+    for key in latency_keys(fields):
+        queue_times = registry.percentiles(key, "queue")
+        generation = registry.percentiles(key, "generation")
+        if not generation or generation[1] < LATENCY_MIN_SAMPLES:
+            continue
+        if status == "In Progress":
+            started = parse_timestamp(fields.get('InProgressAt')) or now
+            return max(0, generation[0][50] - (now - started).total_seconds())
+        if status == "Requested" and queue_times:
+            requested = parse_timestamp(fields.get('RequestedAt')) or now
+            return max(0, queue_times[0][50] + generation[0][50] - (now - requested).total_seconds())
+    return None
+
+def format_duration(seconds):
+    if seconds < 90:
+        return f"{int(seconds)}s"
+    return f"{seconds / 60:.0f} min"
+
 # Pages (updated to use user_email)
 def login_page():
     st.title("Login")
@@ -365,11 +2419,17 @@ def login_page():
         password = st.text_input("Password", type="password")
         submit_button = st.form_submit_button("Login")
         if submit_button:
-            success, user_id = verify_user(email, password)
+            set_deadline(ACTION_BUDGET_SECONDS)
+            try:
+                success, user_id, user_email = verify_user(email, password)
+            except LoginBusyError:
+                st.error("Too many login attempts right now. Please try again in a moment.")
+                return
             if success:
                 st.session_state['logged_in'] = True
                 st.session_state['user_id'] = user_id
-                st.session_state['user_email'] = email
+                st.session_state['user_email'] = user_email
+                warm_session(user_id, user_email)
                 st.success("Login successful!")
                 st.rerun()
             else:
@@ -383,18 +2443,23 @@ def create_account_page():
         confirm_password = st.text_input("Confirm Password", type="password")
         submit_button = st.form_submit_button("Sign Up")
         if submit_button:
+            set_deadline(ACTION_BUDGET_SECONDS)
             if password != confirm_password:
                 st.error("Passwords don’t match")
             elif len(password) < 6:
                 st.error("Password must be at least 6 characters")
             else:
-                success, message = create_user(email, password)
+                try:
+                    success, message = create_user(email, password)
+                except LoginBusyError:
+                    success, message = False, "Too many sign-ups right now. Please try again in a moment."
                 if success:
                     st.success(message)
                 else:
                     st.error(message)
 
 def create_stripe_session(user_id, amount, description, recurring=False, tokens=None):
+    set_deadline(ACTION_BUDGET_SECONDS)
     try:
         line_item = {
             'price_data': {
@@ -425,13 +2490,13 @@ def create_stripe_session(user_id, amount, description, recurring=False, tokens=
 def subscription_page():
     user_id = st.session_state['user_id']
     user_email = st.session_state['user_email']
-    sub_status, tokens, _, _, _, _ = get_user_data(user_id)
+    user = get_user(user_id)
 
     col1, col2 = st.columns([2, 1])
     with col1:
         st.title("Subscription")
     with col2:
-        if sub_status in ["Free", "Expired"]:
+        if user.sub_status in ["Free", "Expired"]:
             if st.button("Upgrade to Premium ($10/month)", key="upgrade_button"):
                 session = create_stripe_session(user_id, 10, "Premium Plan", recurring=True)
                 if session:
@@ -450,28 +2515,31 @@ def subscription_page():
             st.success("You’re on the Premium plan!", icon="✅")
 
     st.subheader("This Month's Usage")
-    stats = get_usage_stats(user_email, months_back=0)
-    current_month_stats = stats[0]
-    cols = st.columns(4)
-    with cols[0]:
-        st.markdown(f'<div class="stats-card"><div class="stats-title">Blog Posts</div><div class="stats-value">{current_month_stats["Blog Post"]}</div></div>', unsafe_allow_html=True)
-    with cols[1]:
-        st.markdown(f'<div class="stats-card"><div class="stats-title">SEO Articles</div><div class="stats-value">{current_month_stats["SEO Article"]}</div></div>', unsafe_allow_html=True)
-    with cols[2]:
-        st.markdown(f'<div class="stats-card"><div class="stats-title">Social Media Posts</div><div class="stats-value">{current_month_stats["Social Media Post"]}</div></div>', unsafe_allow_html=True)
-    with cols[3]:
-        st.markdown(f'<div class="stats-card"><div class="stats-title">Tokens Used</div><div class="stats-value">{current_month_stats["Tokens Used"]}</div></div>', unsafe_allow_html=True)
+    def render_current_usage():
+        current_month_stats = get_usage_stats(user_email, months_back=0)[0]
+        cols = st.columns(4)
+        with cols[0]:
+            st.markdown(f'<div class="stats-card"><div class="stats-title">Blog Posts</div><div class="stats-value">{current_month_stats["Blog Post"]}</div></div>', unsafe_allow_html=True)
+        with cols[1]:
+            st.markdown(f'<div class="stats-card"><div class="stats-title">SEO Articles</div><div class="stats-value">{current_month_stats["SEO Article"]}</div></div>', unsafe_allow_html=True)
+        with cols[2]:
+            st.markdown(f'<div class="stats-card"><div class="stats-title">Social Media Posts</div><div class="stats-value">{current_month_stats["Social Media Post"]}</div></div>', unsafe_allow_html=True)
+        with cols[3]:
+            st.markdown(f'<div class="stats-card"><div class="stats-title">Tokens Used</div><div class="stats-value">{current_month_stats["Tokens Used"]}</div></div>', unsafe_allow_html=True)
+    render_optional(render_current_usage, "This month's usage is unavailable right now. Reload the page to try again.")
 
     st.subheader("Token Usage History")
-    stats = get_usage_stats(user_email, months_back=6)
-    for months_ago, data in stats.items():
-        month_name = (datetime.now(timezone.utc) - relativedelta(months=months_ago)).strftime("%B %Y")
-        if any(data.values()):
-            with st.expander(f"{month_name}"):
-                st.write(f"Blog Posts: {data['Blog Post']}")
-                st.write(f"SEO Articles: {data['SEO Article']}")
-                st.write(f"Social Media Posts: {data['Social Media Post']}")
-                st.write(f"Tokens Used: {data['Tokens Used']}")
+    def render_usage_history():
+        stats = get_usage_stats(user_email, months_back=6)
+        for months_ago, data in stats.items():
+            month_name = (datetime.now(timezone.utc) - relativedelta(months=months_ago)).strftime("%B %Y")
+            if any(data.values()):
+                with st.expander(f"{month_name}"):
+                    st.write(f"Blog Posts: {data['Blog Post']}")
+                    st.write(f"SEO Articles: {data['SEO Article']}")
+                    st.write(f"Social Media Posts: {data['Social Media Post']}")
+                    st.write(f"Tokens Used: {data['Tokens Used']}")
+    render_optional(render_usage_history, "Usage history is taking longer than usual. Reload the page to see it.")
 
     st.subheader("Buy Additional Tokens")
     col1, col2 = st.columns(2)
@@ -495,16 +2563,17 @@ def subscription_page():
 
 def settings_page():
     user_id = st.session_state['user_id']
-    _, _, name, phone, company_name, website = get_user_data(user_id)
+    user = get_user(user_id)
 
     with st.form(key='settings_form'):
-        new_name = st.text_input("Full Name", value=name)
-        new_phone = st.text_input("Phone Number", value=phone)
-        new_company_name = st.text_input("Company Name", value=company_name)
-        new_website = st.text_input("Website", value=website)
+        new_name = st.text_input("Full Name", value=user.name)
+        new_phone = st.text_input("Phone Number", value=user.phone)
+        new_company_name = st.text_input("Company Name", value=user.company_name)
+        new_website = st.text_input("Website", value=user.website)
         submit_button = st.form_submit_button("Save Changes")
         
         if submit_button:
+            set_deadline(ACTION_BUDGET_SECONDS)
             try:
                 users_table.update(user_id, {
                     "Name": new_name,
@@ -512,34 +2581,106 @@ def settings_page():
                     "CompanyName": new_company_name,
                     "Website": new_website
                 })
-                if 'user_data' in st.session_state:
-                    st.session_state['user_data'].update({
-                        'name': new_name,
-                        'phone': new_phone,
-                        'company_name': new_company_name,
-                        'website': new_website
-                    })
+                update_cached_user_data(user_id, name=new_name, phone=new_phone,
+                                        company_name=new_company_name, website=new_website)
                 st.success("Settings updated successfully!")
             except Exception as e:
                 st.error(f"Error updating settings: {str(e)}")
 
+def admin_page():
+    st.title("Analytics")
+    if not is_admin(st.session_state.get('user_email')):
+        st.error("Unauthorized.")
+        return
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        days_back = st.selectbox("Period", ANALYTICS_PERIODS, index=2, format_func=lambda d: f"Last {d} days")
+    with col2:
+        force = st.button("Refresh Snapshot")
+    snapshot, refreshing, error = analytics_snapshot(force)
+    if error:
+        st.error(f"The last analytics snapshot refresh failed: {error}")
+    if snapshot is None:
+        if refreshing:
+            st.info("Building the first analytics snapshot. Check back in a moment.")
+        return
+    content_df, users_df, snapshot_time = snapshot
+    st.caption(f"Snapshot of {len(content_df):,} content records and {len(users_df):,} users taken {snapshot_time.strftime('%Y-%m-%d %H:%M UTC')}"
+               + (" (refreshing in the background)" if refreshing else ""))
+    analytics = compute_analytics(content_df, users_df, days_back)
+
+    totals = analytics["totals"]
+    cols = st.columns(4)
+    for col, (title, value) in zip(cols, [
+        ("Requests", f"{totals['requests']:,}"),
+        ("Tokens Used", f"{totals['tokens']:,}"),
+        ("Failure Rate", f"{totals['failure_rate']:.1%}"),
+        ("Cancellation Rate", f"{totals['cancel_rate']:.1%}")
+    ]):
+        with col:
+            st.markdown(f'<div class="stats-card"><div class="stats-title">{title}</div><div class="stats-value">{value}</div></div>', unsafe_allow_html=True)
+
+    st.subheader("Tokens Consumed per Day")
+    st.plotly_chart(px.bar(analytics["tokens_per_day"], x="day", y="tokens", color="plan"), use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Content Mix")
+        st.plotly_chart(px.pie(analytics["content_mix"], names="content_type", values="count"), use_container_width=True)
+    with col2:
+        st.subheader("Outcome Rates by Type")
+        status_rates = analytics["status_rates"].melt(id_vars="content_type", var_name="status", value_name="rate")
+        st.plotly_chart(px.bar(status_rates, x="content_type", y="rate", color="status", barmode="stack"), use_container_width=True)
+
+    st.subheader("Free vs Premium")
+    plan_usage = analytics["plan_usage"]
+    st.plotly_chart(px.bar(plan_usage.melt(id_vars="plan", value_vars=["requests", "tokens", "active_users", "users"]),
+                           x="variable", y="value", color="plan", barmode="group"), use_container_width=True)
+
+    st.subheader("Pipeline Latency")
+    latency = pd.DataFrame(latency_registry().snapshot())
+    if latency.empty:
+        st.info("No completed records with status timestamps yet.")
+    else:
+        stage = st.selectbox("Stage", list(LATENCY_STAGES), key="latency_stage")
+        latency = latency[latency["stage"] == stage].sort_values(["content_type", "samples"], ascending=[True, False])
+        st.dataframe(latency.drop(columns="stage"), use_container_width=True, hide_index=True)
+        coarse = latency[(latency["word_count"] == "all") & (latency["plan"] == "all")]
+        st.plotly_chart(px.bar(coarse.melt(id_vars="content_type", value_vars=["p50_s", "p95_s", "p99_s"]),
+                               x="content_type", y="value", color="variable", barmode="group",
+                               labels={"value": "seconds"}), use_container_width=True)
+
 def content_tool_page(tool_type):
     st.title(f"{tool_type} Tool")
     user_id = st.session_state['user_id']
     user_email = st.session_state['user_email']
-    _, tokens, _, _, _, _ = get_user_data(user_id)
+    user = get_user(user_id)
 
     query_params = st.query_params
     content_id = query_params.get("content_id")
 
     if content_id:
         try:
-            item = content_table.get(content_id)
-            if item and st.session_state['user_email'] in item['fields'].get('UserEmail', ''):
-                fields = item['fields']
+            record = get_content_detail(content_id)
+            if owned_by(record, user_email) and is_pending_fan_out_primary(record['fields']):
+                try:
+                    resolve_fan_out_group(content_id, user_email)
+                except Exception as e:
+                    logger.error(f"Failed to split fan-out output of {content_id}: {str(e)}")
+                record = get_content_detail(content_id)
+            if owned_by(record, user_email):
+                fields = stamp_observed_transition(content_id, record['fields'])
+                fields = merge_section_output(content_id, fields)
+                fields = rehydrate_archived(content_id, fields)
+                read_only = archive_unavailable(fields)
+                spec = load_content_spec(fields)
                 st.subheader(f"{fields.get('ContentType', 'Untitled')} - {fields.get('Status', 'N/A')}")
+                if read_only:
+                    st.error("The archived text of this content could not be loaded. Editing is disabled until it is available again.")
                 
-                tab1, tab2 = st.tabs(["Preview", "Edit"])
+                if fields.get('Status') == "Completed" and not read_only and output_has_changed(content_id, fields):
+                    get_version_store().add(content_id, fields.get('Output', ''), fields.get('Details', ''), "Generated")
+                tab1, tab2, tab3 = st.tabs(["Preview", "Edit", "History"])
                 
                 with tab1:
                     st.markdown('<div class="preview-container">', unsafe_allow_html=True)
@@ -551,59 +2692,117 @@ def content_tool_page(tool_type):
                         except:
                             st.text(output)
                     if fields.get('Status') in ["Requested", "In Progress"]:
-                        st.spinner("Generating content...")
-                    st.write(f"**Created**: {item.get('createdTime', 'N/A')}")
+                        eta = estimate_remaining_seconds(fields)
+                        if eta is not None:
+                            st.caption(f"Estimated time remaining: ~{format_duration(eta)}")
+                        if STREAMING_ENABLED:
+                            st.subheader("Preview")
+                            stream_preview(content_id)
+                        else:
+                            st.info("Generating content...")
+                    elif STREAMING_ENABLED and fields.get('Status') == "Completed":
+                        reset_stream(content_id)
+                    st.write(f"**Created**: {record.get('createdTime', 'N/A')}")
                     st.markdown('</div>', unsafe_allow_html=True)
                 
                 with tab2:
                     st.markdown('<div class="preview-container">', unsafe_allow_html=True)
-                    if fields.get('Status') == "Completed":
+                    if fields.get('Status') == "Completed" and not read_only:
                         with st.form(key=f"edit_content_{content_id}"):
                             edited_details = st.text_area("Edit Details", value=fields.get('Details', ''), key=f"edit_details_{content_id}")
+                            edited_spec = spec_inputs(fields['ContentType'], spec, key=f"edit_spec_{content_id}")
                             edited_output = st.text_area("Edit Content", value=output, height=300)
                             col1, col2 = st.columns(2)
                             with col1:
                                 if st.form_submit_button("Save Changes"):
-                                    content_table.update(content_id, {"Output": edited_output, "Details": edited_details})
-                                    st.success("Content updated successfully!")
-                                    st.rerun()
-                            with col2:
-                                if st.form_submit_button("Save & Regenerate"):
-                                    content_details = {}
-                                    if '{' in edited_details:
-                                        try:
-                                            content_details = eval(edited_details.split('\n')[-1])
-                                        except:
-                                            pass
+                                    set_deadline(ACTION_BUDGET_SECONDS)
+                                    record_versions(content_id, fields, edited_output, edited_details, "Edited")
                                     content_table.update(content_id, {
+                                        "Output": edited_output,
+                                        "Archived": False,
                                         "Details": edited_details,
-                                        "Output": "",
-                                        "Status": "Requested"
+                                        "Spec": dump_content_spec(edited_spec)
                                     })
-                                    request_content(user_id, fields['ContentType'], edited_details, content_id, content_details)
-                                    st.success("Content resubmitted for generation!")
+                                    invalidate_user_content(user_email, content_id)
+                                    st.success("Content updated successfully!")
                                     st.rerun()
+                            with col2:
+                                if st.form_submit_button("Save & Regenerate"):
+                                    set_deadline(ACTION_BUDGET_SECONDS)
+                                    regenerate_sections = plan_regeneration(fields, spec, edited_spec, edited_details, edited_output)
+                                    regen_cost = regeneration_token_cost(fields['ContentType'], edited_spec, regenerate_sections)
+                                    if user.tokens < regen_cost:
+                                        st.error(f"Not enough tokens! Required: {regen_cost}, Available: {user.tokens}")
+                                    else:
+                                        record_versions(content_id, fields, edited_output, edited_details, "Edited before regenerating")
+                                        content_table.update(content_id, {
+                                            "Details": edited_details,
+                                            "Spec": dump_content_spec(edited_spec),
+                                            # Keep the edited text so unchanged sections survive a partial regeneration
+                                            "Output": edited_output if regenerate_sections else "",
+                                            "Archived": False,
+                                            "SectionOutput": "",
+                                            **status_fields("Requested")
+                                        })
+                                        invalidate_user_content(user_email, content_id)
+                                        if request_content(user_id, fields['ContentType'], edited_details, content_id, regen_cost, edited_spec,
+                                                           sections=regenerate_sections, output=edited_output if regenerate_sections else None):
+                                            if regenerate_sections:
+                                                st.success(f"Regenerating {len(regenerate_sections)} changed section(s)!")
+                                            else:
+                                                st.success("Content resubmitted for generation!")
+                                        else:
+                                            st.error("Failed to request content generation. Check logs for details.")
+                                        st.rerun()
                     elif fields.get('Status') == "Failed":
                         with st.form(key=f"edit_{content_id}"):
                             new_details = st.text_area("Edit Details", value=fields.get('Details', ''), key=f"edit_details_{content_id}")
+                            new_spec = spec_inputs(fields['ContentType'], spec, key=f"edit_spec_{content_id}")
                             if st.form_submit_button("Resubmit"):
+                                set_deadline(ACTION_BUDGET_SECONDS)
                                 content_table.update(content_id, {
                                     "Details": new_details,
-                                    "Status": "Requested"
+                                    "Spec": dump_content_spec(new_spec),
+                                    **status_fields("Requested")
                                 })
-                                content_details = {}
-                                if request_content(user_id, fields['ContentType'], new_details, content_id, content_details):
+                                invalidate_user_content(user_email, content_id)
+                                token_cost = token_cost_for(fields['ContentType'], new_spec.get("word_count"))
+                                if request_content(user_id, fields['ContentType'], new_details, content_id, token_cost, new_spec):
                                     st.success("Request resubmitted!")
                                 else:
                                     st.error("Failed to resubmit request.")
                                 st.rerun()
                     st.markdown('</div>', unsafe_allow_html=True)
+
+                with tab3:
+                    versions = get_version_store().versions(content_id)
+                    if not versions:
+                        st.info("No earlier versions yet.")
+                    else:
+                        selected = st.selectbox(
+                            "Version", versions,
+                            format_func=lambda v: f"v{v['version']} - {v['note']} ({v['created'][:16].replace('T', ' ')})",
+                            key=f"history_{content_id}"
+                        )
+                        snapshot = get_version_store().get(content_id, selected['version'])
+                        st.text_area("Content", snapshot['output'], height=300, disabled=True, key=f"history_output_{content_id}_{selected['version']}")
+                        if snapshot['details']:
+                            st.caption(f"Details: {snapshot['details']}")
+                        if fields.get('Status') == "Completed" and not read_only and st.button(f"Restore v{selected['version']}", key=f"restore_{content_id}"):
+                            set_deadline(ACTION_BUDGET_SECONDS)
+                            content_table.update(content_id, {"Output": snapshot['output'], "Details": snapshot['details'], "Archived": False})
+                            get_version_store().add(content_id, snapshot['output'], snapshot['details'], f"Restored v{selected['version']}")
+                            invalidate_user_content(user_email, content_id)
+                            st.success(f"Restored version {selected['version']}!")
+                            st.rerun()
                 
                 col1, col2, col3 = st.columns([1, 1, 1])
                 with col1:
                     if fields.get('Status') in ["Requested", "In Progress"]:
                         if st.button("Cancel", key=f"cancel_{content_id}", type="secondary"):
-                            content_table.update(content_id, {"Status": "Cancelled"})
+                            set_deadline(ACTION_BUDGET_SECONDS)
+                            content_table.update(content_id, status_fields("Cancelled"))
+                            invalidate_user_content(user_email, content_id)
                             st.success("Request cancelled!")
                             st.query_params.clear()
                             st.rerun()
@@ -616,15 +2815,18 @@ def content_tool_page(tool_type):
                         st.rerun()
             else:
                 st.error("Content not found or unauthorized.")
+        except UpstreamUnavailable:
+            st.warning("Content is temporarily unavailable. Please try again in a moment.")
         except Exception as e:
             st.error(f"Error loading content: {str(e)}")
     
     else:
+        maybe_archive_old_content()
         tab1, tab2 = st.tabs(["Generate New Content", f"Your {tool_type}s"])
         
         with tab1:
             st.subheader(f"Generate New {tool_type}")
-            if tokens <= 0:
+            if user.tokens <= 0:
                 st.warning("You have no tokens left. Upgrade your plan or buy more tokens.")
                 if st.button("Go to Subscription"):
                     st.session_state['page'] = "Subscription"
@@ -632,7 +2834,7 @@ def content_tool_page(tool_type):
             else:
                 details = st.text_area("Content Details", "", height=200, label_visibility="hidden")  # Fixed accessibility
                 token_cost = 0
-                platform = ""
+                platforms = [""]
                 if tool_type in ["Blog Post", "SEO Article"]:
                     keywords = st.text_input("Keywords (comma-separated, 3-5)", placeholder="e.g., AI, tech, tools")
                     word_count = st.selectbox("Word Count", [500, 1000, 1500, 2000])
@@ -640,23 +2842,41 @@ def content_tool_page(tool_type):
                 elif tool_type == "Social Media Post":
                     keywords = ""
                     word_count = ""
-                    platform = st.selectbox("Platform", ["Facebook", "Twitter", "Instagram", "LinkedIn"])
-                    token_cost = TOKEN_COSTS[tool_type]
+                    platforms = st.multiselect("Platforms", SOCIAL_PLATFORMS, default=SOCIAL_PLATFORMS[:1])
+                    token_cost = TOKEN_COSTS[tool_type] * len(platforms)
 
                 st.write(f"Token Cost: {token_cost}")
 
                 if st.button(f"Generate {tool_type}"):
-                    if tokens >= token_cost:
+                    set_deadline(ACTION_BUDGET_SECONDS)
+                    if not platforms:
+                        st.error("Select at least one platform.")
+                    elif len(platforms) > 1 and user.tokens >= token_cost:
+                        try:
+                            if request_fan_out_content(user_id, user.sub_status, details, keywords, platforms):
+                                st.success(f"{tool_type} generation requested for {len(platforms)} platforms! {token_cost} token(s) will be deducted upon completion.")
+                            else:
+                                st.error("Failed to request content generation. Check logs for details.")
+                            invalidate_user_content(user_email)
+                            st.rerun()
+                        except Exception as e:
+                            st.error(f"Error creating content records: {str(e)}")
+                    elif user.tokens >= token_cost:
                         try:
+                            platform = platforms[0]
+                            spec = build_content_spec(tool_type, keywords, word_count, platform)
                             content_record = content_table.create({
                                 "UserID": [user_id],
                                 "ContentType": tool_type,
                                 "Details": details,
-                                "Status": "Requested",
+                                "Spec": dump_content_spec(spec),
+                                "Plan": user.sub_status,
+                                **status_fields("Requested")
                             })
                             content_record_id = content_record['id']
+                            invalidate_user_content(user_email)
                             # Call webhook and log result
-                            if request_content(user_id, tool_type, details, content_record_id, token_cost, keywords, word_count, platform):
+                            if request_content(user_id, tool_type, details, content_record_id, token_cost, spec):
                                 st.success(f"{tool_type} generation requested! {token_cost} token(s) will be deducted upon completion.")
                             else:
                                 st.error("Failed to request content generation. Check logs for details.")
@@ -664,22 +2884,24 @@ def content_tool_page(tool_type):
                         except Exception as e:
                             st.error(f"Error creating content record: {str(e)}")
                     else:
-                        st.error(f"Not enough tokens! Required: {token_cost}, Available: {tokens}")
+                        st.error(f"Not enough tokens! Required: {token_cost}, Available: {user.tokens}")
 
         with tab2:
             st.subheader(f"Your {tool_type}s")
             content_items = get_user_content(user_email, tool_type)
+            if tool_type == "Social Media Post":
+                resolve_fan_out_groups(content_items, user_email)
             
             if content_items:
                 status_filter = st.multiselect("Filter by Status", ["Requested", "In Progress", "Completed", "Failed", "Cancelled"], default=["Requested", "In Progress", "Completed", "Failed", "Cancelled"])
-                filtered_items = [item for item in content_items if item['fields'].get('Status', 'N/A') in status_filter]
+                filtered_items = [item for item in content_items if item.status in status_filter]
+                prefetch_details("content", filtered_items)
                 
                 if filtered_items:
                     selected_items = []
                     st.write("Select items for bulk actions:")
                     for item in filtered_items:
-                        fields = item['fields']
-                        content_id = item['id']
+                        content_id = item.id
                         with st.container():
                             st.markdown(f'<div class="content-card">', unsafe_allow_html=True)
                             col1, col2 = st.columns([1, 5])
@@ -687,7 +2909,7 @@ def content_tool_page(tool_type):
                                 if st.checkbox("", key=f"select_{content_id}"):
                                     selected_items.append(content_id)
                             with col2:
-                                if st.button(f"{fields.get('ContentType', 'Untitled')} - {fields.get('Status', 'N/A')}\nCreated: {item.get('createdTime', 'N/A')}", 
+                                if st.button(item.label, 
                                              key=f"card_{content_id}", 
                                              type="secondary", 
                                              help="Click to view details", 
@@ -700,22 +2922,30 @@ def content_tool_page(tool_type):
                         col1, col2 = st.columns(2)
                         with col1:
                             if st.button("Cancel Selected"):
+                                set_deadline(ACTION_BUDGET_SECONDS)
                                 for cid in selected_items:
                                     item = content_table.get(cid)
                                     if item['fields'].get('Status') in ["Requested", "In Progress"]:
-                                        content_table.update(cid, {"Status": "Cancelled"})
+                                        content_table.update(cid, status_fields("Cancelled"))
+                                invalidate_user_content(user_email, *selected_items)
                                 st.success(f"Cancelled {len(selected_items)} item(s)!")
                                 st.rerun()
                         with col2:
                             if st.button("Resubmit Selected"):
+                                set_deadline(ACTION_BUDGET_SECONDS)
                                 for cid in selected_items:
                                     item = content_table.get(cid)
                                     if item['fields'].get('Status') == "Failed":
-                                        content_table.update(cid, {"Status": "Requested"})
+                                        content_table.update(cid, status_fields("Requested"))
+                                        if STREAMING_ENABLED:
+                                            reset_stream(cid)
                                         st.success(f"Resubmitted {cid}!")
+                                invalidate_user_content(user_email, *selected_items)
                                 st.rerun()
                 else:
                     st.info(f"No {tool_type.lower()}s match the selected filters.")
+            elif "content" in st.session_state['unavailable_sources']:
+                st.warning(f"Your {tool_type.lower()}s could not be loaded right now.")
             else:
                 st.info(f"No {tool_type.lower()}s found.")
 
@@ -723,93 +2953,62 @@ def resume_enhancement_page():
     st.title("Resume Enhancement Tool")
     user_id = st.session_state['user_id']
     user_email = st.session_state['user_email']
-    _, tokens, _, _, _, _ = get_user_data(user_id)
+    user = get_user(user_id)
 
     query_params = st.query_params
     resume_id = query_params.get("resume_id")
 
     if resume_id:
         try:
-            item = resumes_table.get(resume_id)
-            if item and st.session_state['user_email'] in item['fields'].get('UserEmail', ''):
-                fields = item['fields']
+            record = get_resume_detail(resume_id)
+            if owned_by(record, user_email):
+                item = resume_item(record)
+                fields = record['fields']
                 st.title("Resume Details")
                 st.subheader(fields.get('OriginalFileName', 'Untitled'))
 
                 col_main, col_actions = st.columns([3, 1])
 
                 with col_main:
-                    if 'File' in fields and fields['File']:
+                    # Stored parses are free; downloading an older attachment is skipped once the budget is spent
+                    parsed = None
+                    preview_deferred = not fields.get('Parsed') and not within_budget()
+                    if not preview_deferred:
+                        try:
+                            parsed = load_parsed_resume(resume_id, fields)
+                        except (requests.exceptions.RequestException, UpstreamUnavailable) as e:
+                            logger.warning(f"Resume preview for {resume_id} timed out: {str(e)}")
+                            preview_deferred = True
+                    if preview_deferred:
+                        st.caption("The resume preview is still loading. Reload the page in a moment.")
+                    elif parsed:
+                        st.text_area("", parsed.get('text', ''), height=400, disabled=True)
+                        if parsed.get('sections'):
+                            with st.expander("Detected Sections"):
+                                contact = parsed.get('contact', {})
+                                if contact.get('emails') or contact.get('phones'):
+                                    st.write(f"**Contact**: {', '.join(contact.get('emails', []) + contact.get('phones', []))}")
+                                for section_name, section_text in parsed['sections'].items():
+                                    st.markdown(f"**{section_name.title()}**")
+                                    st.text(section_text)
+                    elif 'File' in fields and fields['File']:
+                        st.warning("Unsupported file format.")
                         file_url = fields['File'][0]['url']
-                        file_name = fields.get('OriginalFileName', '').lower()
-                        response = requests.get(file_url)
-                        response.raise_for_status()
-
-                        if file_name.endswith('.txt'):
-                            content = response.text
-                            st.text_area("", content, height=400, disabled=True)
-                        elif file_name.endswith('.pdf'):
-                            with requests.get(file_url, stream=True) as r:
-                                r.raise_for_status()
-                                with open("temp.pdf", "wb") as f:
-                                    f.write(r.content)
-                                with pdfplumber.open("temp.pdf") as pdf:
-                                    text = "\n".join(page.extract_text() or "" for page in pdf.pages)
-                                os.remove("temp.pdf")
-                            st.text_area("", text, height=400, disabled=True)
-                        else:
-                            st.warning("Unsupported file format.")
-                            st.markdown(f'<a href="{file_url}" target="_blank">Download Resume</a>', unsafe_allow_html=True)
+                        st.markdown(f'<a href="{file_url}" target="_blank">Download Resume</a>', unsafe_allow_html=True)
 
                     output = fields.get('Output', '')
                     if output:
                         st.subheader("Enhanced Resume Content")
                         st.text_area("Enhanced Content", output, height=200, disabled=True)
-                    st.write(f"**Created**: {item.get('createdTime', 'N/A')}")
+                    st.write(f"**Created**: {item.created_text}")
 
                 with col_actions:
                     st.markdown("### Actions")
-                    if fields.get('Type') == "User Uploaded":
-                        resume_token_cost = TOKEN_COSTS["Resume Enhancement"]
+                    if fields.get('Type') == "User Uploaded" and parsed:
                         if st.button("Create Basic Enhanced", key=f"basic_{resume_id}"):
+                            set_deadline(ACTION_BUDGET_SECONDS)
                             try:
-                                # Fetch original file content
-                                original_file_url = fields['File'][0]['url']
-                                file_response = requests.get(original_file_url)
-                                file_response.raise_for_status()
-                                file_content = file_response.content
-                                file_name = fields.get('OriginalFileName', 'Untitled')
-                                content_type = "application/pdf" if file_name.endswith(".pdf") else "text/plain"
-
-                                # Create new record without File initially
-                                new_record = resumes_table.create({
-                                    "UserID": [user_id],
-                                    "OriginalFileName": file_name,
-                                    "Type": "Basic Enhanced",
-                                    "Status": "Requested"
-                                })
-                                new_record_id = new_record['id']
-
-                                # Upload file to new record
-                                file_url = upload_file_to_airtable(
-                                    AIRTABLE_BASE_ID,
-                                    new_record_id,
-                                    "File",
-                                    file_content,
-                                    file_name,
-                                    content_type
-                                )
-
-                                # Send webhook with token cost
-                                payload = {
-                                    "user_id": user_id,
-                                    "content_type": "Resume Enhancement",
-                                    "details": "Basic Enhanced",
-                                    "content_record_id": new_record_id,
-                                    "token_cost": resume_token_cost
-                                }
-                                webhook_url = st.secrets["make"]["resume_webhook_url"]
-                                response = requests.post(webhook_url, json=payload)
+                                response = request_resume_enhancement(user_id, item, parsed, "Basic Enhanced")
                                 if response.status_code == 200:
                                     st.success("Basic Enhanced resume generation requested!")
                                 else:
@@ -820,47 +3019,10 @@ def resume_enhancement_page():
 
                         job_url = st.text_input("Job Posting URL", key=f"job_url_{resume_id}")
                         if st.button("Create Targeted Enhanced", key=f"targeted_{resume_id}"):
+                            set_deadline(ACTION_BUDGET_SECONDS)
                             if job_url:
                                 try:
-                                    # Fetch original file content
-                                    original_file_url = fields['File'][0]['url']
-                                    file_response = requests.get(original_file_url)
-                                    file_response.raise_for_status()
-                                    file_content = file_response.content
-                                    file_name = fields.get('OriginalFileName', 'Untitled')
-                                    content_type = "application/pdf" if file_name.endswith(".pdf") else "text/plain"
-
-                                    # Create new record with JobTargetURL
-                                    new_record = resumes_table.create({
-                                        "UserID": [user_id],
-                                        "OriginalFileName": file_name,
-                                        "Type": "Targeted Enhanced",
-                                        "Status": "Requested",
-                                        "JobTargetURL": job_url
-                                    })
-                                    new_record_id = new_record['id']
-
-                                    # Upload file to new record
-                                    file_url = upload_file_to_airtable(
-                                        AIRTABLE_BASE_ID,
-                                        new_record_id,
-                                        "File",
-                                        file_content,
-                                        file_name,
-                                        content_type
-                                    )
-
-                                    # Send webhook with token cost
-                                    payload = {
-                                        "user_id": user_id,
-                                        "content_type": "Resume Enhancement",
-                                        "details": "Targeted Enhanced",
-                                        "content_record_id": new_record_id,
-                                        "token_cost": resume_token_cost,
-                                        "job_url": job_url  # Keep job_url separate from content_details
-                                    }
-                                    webhook_url = st.secrets["make"]["resume_webhook_url"]
-                                    response = requests.post(webhook_url, json=payload)
+                                    response = request_resume_enhancement(user_id, item, parsed, "Targeted Enhanced", job_url)
                                     if response.status_code == 200:
                                         st.success("Targeted Enhanced resume generation requested!")
                                     else:
@@ -877,13 +3039,15 @@ def resume_enhancement_page():
 
             else:
                 st.error("Resume not found or unauthorized.")
+        except UpstreamUnavailable:
+            st.warning("Resumes are temporarily unavailable. Please try again in a moment.")
         except Exception as e:
             logger.error(f"Error loading resume: {str(e)}")
             st.error(f"Error loading resume: {str(e)}")
     
     else:
         st.subheader("Upload a Resume")
-        if tokens < TOKEN_COSTS["Resume Enhancement"]:
+        if user.tokens < TOKEN_COSTS["Resume Enhancement"]:
             st.warning("You need at least 5 tokens to upload a resume. Upgrade your plan or buy more tokens.")
             if st.button("Go to Subscription"):
                 st.session_state['page'] = "Subscription"
@@ -892,18 +3056,26 @@ def resume_enhancement_page():
 
         uploaded_file = st.file_uploader("Upload your resume (PDF or TXT)", type=["pdf", "txt"])
         if st.button("Upload Resume") and uploaded_file:
+            set_deadline(ACTION_BUDGET_SECONDS)
             cost = TOKEN_COSTS["Resume Enhancement"]
-            if tokens >= cost:
+            if user.tokens >= cost:
                 try:
                     file_content = uploaded_file.read()
                     file_name = uploaded_file.name
                     content_type = "application/pdf" if file_name.endswith(".pdf") else "text/plain"
-                    resume_record = resumes_table.create({
+                    resume_fields = {
                         "UserID": [user_id],
                         "OriginalFileName": file_name,
                         "Type": "User Uploaded",
                         "Status": "Uploaded"
-                    })
+                    }
+                    try:
+                        resume_fields["Parsed"] = json.dumps(parse_resume(file_content, file_name))
+                    except Exception as e:
+                        # Parsed lazily from the attachment on first view instead
+                        logger.warning(f"Failed to parse resume {file_name}: {str(e)}")
+                    resume_record = resumes_table.create(resume_fields)
+                    invalidate_user_resumes(user_email)
                     resume_record_id = resume_record['id']
                     file_url = upload_file_to_airtable(
                         AIRTABLE_BASE_ID,
@@ -918,23 +3090,23 @@ def resume_enhancement_page():
                     logger.error(f"Error creating resume record: {str(e)}")
                     st.error(f"Error creating resume record: {str(e)}")
             else:
-                st.error(f"Not enough tokens! Required: {cost}, Available: {tokens}")
+                st.error(f"Not enough tokens! Required: {cost}, Available: {user.tokens}")
 
         resume_items = get_user_resumes(user_email)
+        prefetch_details("resumes", resume_items)
         
         if resume_items:
             col_left, col_right = st.columns(2)
             
             with col_left:
                 st.write("### Uploaded Resumes")
-                user_uploaded = [item for item in resume_items if item['fields'].get('Type') == "User Uploaded"]
+                user_uploaded = [item for item in resume_items if item.kind == "User Uploaded"]
                 if user_uploaded:
                     for item in user_uploaded:
-                        fields = item['fields']
-                        resume_id = item['id']
+                        resume_id = item.id
                         with st.container():
                             st.markdown(f'<div class="content-card">', unsafe_allow_html=True)
-                            if st.button(f"{fields.get('OriginalFileName', 'Untitled')} - {fields.get('Status', 'N/A')}\nCreated: {item.get('createdTime', 'N/A')}", 
+                            if st.button(item.label, 
                                          key=f"resume_card_{resume_id}", 
                                          type="secondary", 
                                          help="Click to view details", 
@@ -947,14 +3119,13 @@ def resume_enhancement_page():
 
             with col_right:
                 st.write("### Generated Resumes")
-                generated = [item for item in resume_items if item['fields'].get('Type') in ["Basic Enhanced", "Targeted Enhanced"]]
+                generated = [item for item in resume_items if item.kind in ["Basic Enhanced", "Targeted Enhanced"]]
                 if generated:
                     for item in generated:
-                        fields = item['fields']
-                        resume_id = item['id']
+                        resume_id = item.id
                         with st.container():
                             st.markdown(f'<div class="content-card">', unsafe_allow_html=True)
-                            if st.button(f"{fields.get('Type', 'Untitled')} - {fields.get('Status', 'N/A')}\nCreated: {item.get('createdTime', 'N/A')}", 
+                            if st.button(item.label, 
                                          key=f"resume_card_{resume_id}", 
                                          type="secondary", 
                                          help="Click to view details", 
@@ -964,11 +3135,28 @@ def resume_enhancement_page():
                             st.markdown('</div>', unsafe_allow_html=True)
                 else:
                     st.info("No generated resumes found.")
+        elif "resumes" in st.session_state['unavailable_sources']:
+            st.warning("Your resumes could not be loaded right now.")
         else:
             st.info("No resumes found.")
             
-# Request content (unchanged)
-def request_content(user_id, content_type, details, content_record_id, token_cost, keywords, word_count, platform):
+# Structured spec inputs for the edit forms
+def spec_inputs(content_type, spec, key):
+    if content_type in ["Blog Post", "SEO Article"]:
+        keywords = st.text_input("Keywords (comma-separated, 3-5)", value=", ".join(spec.get("keywords") or []), key=f"{key}_keywords")
+        word_counts = [500, 1000, 1500, 2000]
+        current = spec.get("word_count") if spec.get("word_count") in word_counts else 500
+        word_count = st.selectbox("Word Count", word_counts, index=word_counts.index(current), key=f"{key}_word_count")
+        return build_content_spec(content_type, keywords, word_count)
+    if content_type == "Social Media Post":
+        platforms = ["Facebook", "Twitter", "Instagram", "LinkedIn"]
+        current = spec.get("platform") if spec.get("platform") in platforms else platforms[0]
+        platform = st.selectbox("Platform", platforms, index=platforms.index(current), key=f"{key}_platform")
+        return build_content_spec(content_type, platform=platform)
+    return spec
+
+# Request content; "sections" limits generation to the listed sections of "output"
+def request_content(user_id, content_type, details, content_record_id, token_cost, spec, sections=None, output=None):
     webhook_url = st.secrets["make"]["webhook_url"]
     payload = {
         "user_id": user_id,
@@ -976,13 +3164,27 @@ def request_content(user_id, content_type, details, content_record_id, token_cos
         "details": details,
         "record_id": content_record_id,
         "token_cost": token_cost,
-        "keywords": keywords,
-        "word_count": word_count,
-        "platform": platform
+        "spec": spec,
+        "keywords": ", ".join(spec.get("keywords") or []),
+        "word_count": spec.get("word_count") or "",
+        "platform": spec.get("platform") or "",
+        # The backend stamps these alongside the statuses it sets
+        "status_timestamp_fields": STATUS_TIMESTAMP_FIELDS
     }
+    if sections is not None:
+        payload["sections"] = sections
+        payload["output"] = output
+    if STREAMING_ENABLED:
+        # Chunks and the seen seq from an earlier run would hide the new run's chunks
+        reset_stream(content_record_id)
+        payload["stream_url"] = stream_callback_url(content_record_id)
+        if get_setting("streaming", "fake_generator", False):
+            fake_stream_generation(content_record_id, details, sections)
+            return True
     try:
-        logger.debug(f"Sending webhook to {webhook_url} with payload: {payload}")
-        response = requests.post(webhook_url, json=payload)
+        if debug_sampled():
+            logger.debug("Sending webhook to %s with payload: %s", webhook_url, json.dumps(redact_payload(payload)), extra=SAMPLED)
+        response = outbound_session().post(webhook_url, json=payload)
         if response.status_code == 200:
             logger.debug("Webhook fired successfully")
             return True
@@ -993,14 +3195,69 @@ def request_content(user_id, content_type, details, content_record_id, token_cos
         logger.error(f"Error firing webhook: {str(e)}")
         return False
 
+# One batch of child records and one webhook for several social platforms
+def request_fan_out_content(user_id, plan, details, keywords, platforms):
+    group_id = uuid.uuid4().hex
+    specs = [
+        dict(build_content_spec("Social Media Post", keywords, platform=platform),
+             fan_out={"group": group_id, "platforms": platforms, "primary": index == 0, "split": False})
+        for index, platform in enumerate(platforms)
+    ]
+    records = content_table.batch_create([{
+        "UserID": [user_id],
+        "ContentType": "Social Media Post",
+        "Details": details,
+        "Spec": dump_content_spec(spec),
+        "Plan": plan,
+        **status_fields("Requested")
+    } for spec in specs])
+    record_ids = [record['id'] for record in records]
+    primary_spec = dict(specs[0], fan_out=dict(specs[0]["fan_out"], record_ids=record_ids))
+    content_table.update(record_ids[0], {"Spec": dump_content_spec(primary_spec)})
+
+    webhook_url = st.secrets["make"]["webhook_url"]
+    payload = {
+        "user_id": user_id,
+        "content_type": "Social Media Post",
+        "details": details,
+        "record_id": record_ids[0],
+        # Announced total; the backend charges each child's token_cost for the platform sections it writes
+        "token_cost": token_cost_for("Social Media Post") * len(platforms),
+        "spec": primary_spec,
+        "keywords": ", ".join(primary_spec.get("keywords") or []),
+        "platforms": platforms,
+        # The combined output goes to record_id as one "## <Platform>" section per platform
+        "fan_out": [
+            {"record_id": record_id, "platform": platform, "token_cost": token_cost_for("Social Media Post")}
+            for record_id, platform in zip(record_ids, platforms)
+        ],
+        "status_timestamp_fields": STATUS_TIMESTAMP_FIELDS
+    }
+    try:
+        if debug_sampled():
+            logger.debug("Sending fan-out webhook to %s with payload: %s", webhook_url, json.dumps(redact_payload(payload)), extra=SAMPLED)
+        response = outbound_session().post(webhook_url, json=payload)
+        if response.status_code == 200:
+            return True
+        logger.error(f"Fan-out webhook failed with status {response.status_code}: {response.text}")
+        return False
+    except Exception as e:
+        logger.error(f"Error firing fan-out webhook: {str(e)}")
+        return False
+
 # Main with enhanced logging
 def main():
     if 'logged_in' not in st.session_state:
         st.session_state['logged_in'] = False
     if 'page' not in st.session_state:
         st.session_state['page'] = "Login"
+    st.session_state['stale_sources'] = set()
+    st.session_state['unavailable_sources'] = set()
+    stale_notice = st.empty()
 
     query_params = st.query_params
+    detail_open = query_params.get("content_id") or query_params.get("resume_id")
+    set_deadline(DETAIL_BUDGET_SECONDS if detail_open else PAGE_BUDGET_SECONDS)
     user_id_from_url = query_params.get("user_id")
     email_from_url = query_params.get("email")
 
@@ -1011,10 +3268,12 @@ def main():
                 st.session_state['logged_in'] = True
                 st.session_state['user_id'] = user_id_from_url
                 st.session_state['user_email'] = email_from_url
+                warm_session(user_id_from_url, email_from_url)
         except Exception as e:
             st.error(f"Error restoring session: {str(e)}")
 
     if query_params.get("success") == "true" and user_id_from_url:
+        set_deadline(ACTION_BUDGET_SECONDS)
         try:
             record = users_table.get(user_id_from_url)
             if record:
@@ -1026,6 +3285,7 @@ def main():
             st.error(f"Error updating subscription: {str(e)}")
             logger.error(f"Subscription update failed for {user_id_from_url}: {str(e)}")
     elif query_params.get("token_success") == "true" and user_id_from_url:
+        set_deadline(ACTION_BUDGET_SECONDS)
         try:
             tokens_to_add = int(query_params.get("tokens"))
             record = users_table.get(user_id_from_url)
@@ -1050,10 +3310,10 @@ def main():
             st.markdown("<h2 style='color: #1E293B;'>AI Toolbox</h2>", unsafe_allow_html=True)
             user_id = st.session_state['user_id']
             user_email = st.session_state['user_email']
-            sub_status, tokens, name, _, _, _ = get_user_data(user_id)
-            st.write(f"**User**: {name or 'N/A'}")
-            st.write(f"**Plan**: {sub_status}")
-            st.write(f"**Tokens**: {tokens}")
+            user = get_user(user_id)
+            st.write(f"**User**: {user.name or 'N/A'}")
+            st.write(f"**Plan**: {user.sub_status}")
+            st.write(f"**Tokens**: {user.tokens}")
 
             with st.expander("📝 Content Generation", expanded=False):
                 if st.button("✍️ Blog Post", key="nav_blog"):
@@ -1079,11 +3339,13 @@ def main():
             if st.button("💳 Subscription", key="nav_subscription"):
                 st.session_state['page'] = "Subscription"
                 st.rerun()
+            if is_admin(user_email) and st.button("📊 Analytics", key="nav_admin"):
+                st.session_state['page'] = "Analytics"
+                st.rerun()
             if st.button("🚪 Logout", key="nav_logout"):
                 st.session_state['logged_in'] = False
                 st.session_state.pop('user_id', None)
                 st.session_state.pop('user_email', None)
-                st.session_state.pop('user_data', None)
                 st.rerun()
 
         page = st.session_state.get('page', "Blog Post")
@@ -1095,6 +3357,13 @@ def main():
             subscription_page()
         elif page == "Settings":
             settings_page()
+        elif page == "Analytics":
+            admin_page()
+
+    if st.session_state['unavailable_sources']:
+        stale_notice.warning(f"Airtable is slow or unavailable. Your {', '.join(sorted(st.session_state['unavailable_sources']))} could not be loaded right now; please try again in a moment.", icon="⏳")
+    elif st.session_state['stale_sources']:
+        stale_notice.warning(f"Airtable is slow or unavailable. Showing last saved {', '.join(sorted(st.session_state['stale_sources']))} data, which may be out of date.", icon="⏳")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
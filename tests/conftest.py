@@ -0,0 +1,46 @@
+import ast
+import logging
+import sys
+from pathlib import Path
+
+import pytest
+
+APP_PATH = Path(__file__).resolve().parent.parent / "streamlit_app.py"
+sys.path.insert(0, str(APP_PATH.parent))
+
+
+# streamlit_app.py configures Streamlit and the Airtable clients on import, so tests compile just the
+# top-level definitions they exercise; settings and collaborators they reference come from the test
+@pytest.fixture(scope="session")
+def app_tree():
+    return ast.parse(APP_PATH.read_text(encoding="utf-8"))
+
+
+@pytest.fixture
+def load_app(app_tree):
+    def load(*names, **namespace):
+        namespace.setdefault("logger", logging.getLogger("streamlit_app"))
+        # The app's own imports that resolve here: the standard library and app_shared
+        for node in app_tree.body:
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                try:
+                    exec(compile(ast.Module([node], []), str(APP_PATH), "exec"), namespace)
+                except ImportError:
+                    pass
+        definitions = {}
+        for node in app_tree.body:
+            if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+                definitions[node.name] = node
+            elif isinstance(node, ast.Assign):
+                for target in node.targets:
+                    if isinstance(target, ast.Name):
+                        definitions[target.id] = node
+        for name in names:
+            node = definitions[name]
+            if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+                # Drops st.cache_resource and friends
+                node = ast.copy_location(type(node)(**dict(ast.iter_fields(node), decorator_list=[])), node)
+            module = ast.fix_missing_locations(ast.Module([node], []))
+            exec(compile(module, str(APP_PATH), "exec"), namespace)
+        return namespace
+    return load
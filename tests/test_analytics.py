@@ -0,0 +1,122 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+
+class FakeTable:
+    def __init__(self, records):
+        self.records = records
+        self.queries = []
+
+    def all(self, formula=None, fields=None):
+        self.queries.append((formula, fields))
+        if formula:
+            return [r for r in self.records if f"'{r['id']}'" in formula]
+        return self.records
+
+
+def created(days_ago):
+    return (datetime.now(timezone.utc) - timedelta(days=days_ago)).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def content(record_id, days_ago, content_type, status, email, spec=None, details=None):
+    fields = {"ContentType": content_type, "Status": status, "UserEmail": [email]}
+    if spec is not None:
+        fields["Spec"] = json.dumps(spec)
+    if details is not None:
+        fields["Details"] = details
+    return {"id": record_id, "createdTime": created(days_ago), "fields": fields}
+
+
+NAMES = ("TOKEN_COSTS", "SPEC_SCHEMA_VERSION", "SPEC_MIGRATIONS", "build_content_spec", "load_content_spec",
+         "formula_string", "records_by_id", "first_value", "ANALYTICS_PERIODS", "legacy_word_counts",
+         "load_analytics_snapshot", "token_costs_vectorized", "compute_analytics")
+
+
+@pytest.fixture
+def load_snapshot(load_app):
+    def load(content_records, user_records, known=None):
+        content_table, users_table = FakeTable(content_records), FakeTable(user_records)
+        app = load_app(*NAMES, content_table=content_table, users_table=users_table)
+        snapshot = app["load_analytics_snapshot"]({} if known is None else known)
+        return app, snapshot, content_table
+    return load
+
+
+CONTENT = [
+    content("rec1", 1, "Blog Post", "Completed", "A@example.com", spec={"word_count": 1500}),
+    content("rec2", 2, "Social Media Post", "Completed", "b@example.com", spec={}),
+    content("rec3", 3, "SEO Article", "Failed", "a@example.com", spec={"word_count": 2000}),
+    # Legacy row: no Spec, word count only in Details
+    content("rec4", 4, "Blog Post", "Completed", "a@example.com", details="{'word_count': '1000'}"),
+    # Author missing from the Users table
+    content("rec5", 5, "Social Media Post", "Completed", "gone@example.com", spec={}),
+    content("rec6", 6, "Blog Post", "Cancelled", "b@example.com", spec={"word_count": 500}),
+    # Outside every period
+    content("rec7", 400, "Blog Post", "Completed", "a@example.com", details="word_count: 5000")
+]
+USERS = [
+    {"id": "usr1", "fields": {"Email": "a@example.com", "Subscription": "Premium"}},
+    {"id": "usr2", "fields": {"Email": "B@example.com"}},
+    {"id": "usr3", "fields": {"Email": "idle@example.com", "Subscription": "Premium"}}
+]
+
+
+def test_snapshot_word_counts_match_load_content_spec(load_snapshot):
+    app, (content_df, users_df, _), table = load_snapshot(CONTENT, USERS)
+    assert list(content_df["word_count"]) == [1500, 500, 2000, 1000, 500, 500, 500]
+    assert list(content_df["email"]) == ["a@example.com", "b@example.com", "a@example.com", "a@example.com",
+                                         "gone@example.com", "b@example.com", "a@example.com"]
+    assert list(users_df["plan"]) == ["Premium", "Free", "Premium"]
+    # Details is read only for the recent legacy row, and nothing is written
+    detail_queries = [formula for formula, fields in table.queries if fields == ["Details"]]
+    assert len(detail_queries) == 1 and "'rec4'" in detail_queries[0] and "'rec7'" not in detail_queries[0]
+
+
+def test_snapshot_reuses_known_legacy_word_counts(load_snapshot):
+    known = {}
+    load_snapshot(CONTENT, USERS, known)
+    assert known == {"rec4": 1000}
+    _, (content_df, _, _), table = load_snapshot(CONTENT, USERS, known)
+    assert content_df["word_count"][3] == 1000
+    assert all(fields != ["Details"] for _, fields in table.queries)
+
+
+def test_empty_tables(load_snapshot):
+    app, (content_df, users_df, _), _ = load_snapshot([], [])
+    assert len(content_df) == 0 and len(users_df) == 0
+    analytics = app["compute_analytics"](content_df, users_df, 30)
+    assert analytics["totals"] == {"requests": 0, "tokens": 0, "failure_rate": 0.0, "cancel_rate": 0.0}
+
+
+def test_compute_analytics(load_snapshot):
+    app, (content_df, users_df, _), _ = load_snapshot(CONTENT, USERS)
+    analytics = app["compute_analytics"](content_df, users_df, 30)
+    totals = analytics["totals"]
+    # rec1: 3, rec2: 2, rec4: 2, rec5: 2; failed and cancelled rows cost nothing
+    assert totals["requests"] == 6
+    assert totals["tokens"] == 9
+    assert totals["failure_rate"] == pytest.approx(1 / 6)
+    assert totals["cancel_rate"] == pytest.approx(1 / 6)
+
+    # Every breakdown accounts for the same content, including the author missing from Users
+    assert analytics["tokens_per_day"]["tokens"].sum() == totals["tokens"]
+    plan_usage = analytics["plan_usage"].set_index("plan")
+    assert plan_usage["requests"].sum() == totals["requests"]
+    assert plan_usage["tokens"].sum() == totals["tokens"]
+    assert plan_usage.loc["Unknown", "tokens"] == 2
+    assert plan_usage.loc["Premium", "tokens"] == 5
+    assert plan_usage.loc["Premium", "active_users"] == 1
+    assert plan_usage.loc["Premium", "users"] == 2
+    assert analytics["content_mix"].set_index("content_type")["count"].to_dict() == {
+        "Blog Post": 3, "SEO Article": 1, "Social Media Post": 2
+    }
+
+
+def test_compute_analytics_period(load_snapshot):
+    app, (content_df, users_df, _), _ = load_snapshot(CONTENT, USERS)
+    assert app["compute_analytics"](content_df, users_df, 3)["totals"]["requests"] == 2
+    assert app["compute_analytics"](content_df, users_df, 365)["totals"]["requests"] == 6
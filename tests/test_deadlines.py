@@ -0,0 +1,66 @@
+import contextvars
+
+import pytest
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def app(load_app):
+    app = load_app("set_deadline", "remaining_budget", "within_budget", "call_timeout", DEFAULT_CALL_TIMEOUT=10,
+                   MIN_CALL_TIMEOUT=1, OPTIONAL_SECTION_MIN_SECONDS=0.5)
+    app["time"] = FakeClock()
+    return app
+
+
+# Each test sets its deadline in a copy of the context, as each rerun does
+def in_context(function):
+    return contextvars.copy_context().run(function)
+
+
+def test_without_a_deadline_calls_use_the_default(app):
+    def check():
+        assert app["remaining_budget"]() is None
+        assert app["within_budget"]()
+        assert app["call_timeout"]() == 10
+        assert app["call_timeout"](3) == 3
+        # Callers can shorten the timeout but never extend it
+        assert app["call_timeout"](30) == 10
+    in_context(check)
+
+
+def test_call_timeout_follows_the_remaining_budget(app):
+    def check():
+        app["set_deadline"](2)
+        assert app["call_timeout"]() == 2
+        assert app["call_timeout"](1.5) == 1.5
+        app["time"].now += 1.7
+        assert app["remaining_budget"]() == pytest.approx(0.3)
+        # A spent budget still leaves required reads the floor
+        assert app["call_timeout"]() == 1
+        assert app["call_timeout"](0.2) == 0.2
+        app["time"].now += 5
+        assert app["remaining_budget"]() == 0.0
+        assert app["call_timeout"]() == 1
+    in_context(check)
+
+
+def test_within_budget(app):
+    def check():
+        app["set_deadline"](2)
+        assert app["within_budget"]()
+        app["time"].now += 1.6
+        assert not app["within_budget"]()
+        assert app["within_budget"](0.2)
+    in_context(check)
+
+
+def test_deadlines_stay_in_their_context(app):
+    in_context(lambda: app["set_deadline"](2))
+    assert in_context(app["remaining_budget"]) is None
@@ -0,0 +1,73 @@
+import sqlite3
+
+import pytest
+
+
+class FakeUsersTable:
+    def __init__(self, records):
+        self.records = records
+        self.queries = []
+
+    def all(self, fields=None, formula=None, max_records=None):
+        self.queries.append(formula)
+        if formula and formula.startswith("LOWER"):
+            email = formula.split("=", 1)[1].strip("'")
+            return [r for r in self.records if r["fields"].get("Email", "").strip().lower() == email][:max_records]
+        return self.records
+
+
+@pytest.fixture
+def users():
+    return FakeUsersTable([
+        {"id": "usr1", "fields": {"Email": " Alice@Example.com"}},
+        {"id": "usr2", "fields": {"Email": "bob@example.com"}},
+        {"id": "usr3", "fields": {}}
+    ])
+
+
+@pytest.fixture
+def index(load_app, tmp_path, users):
+    def local_db(name):
+        return sqlite3.connect(str(tmp_path / name), timeout=10, check_same_thread=False)
+    app = load_app("formula_string", "normalize_email", "EmailIndex", local_db=local_db, users_table=users,
+                   EMAIL_INDEX_SYNC_SECONDS=300, EMAIL_INDEX_FULL_SYNC_SECONDS=86400)
+    return app["EmailIndex"]()
+
+
+def test_full_sync_indexes_normalized_emails(index, users):
+    index.sync()
+    assert users.queries == [None]
+    assert index.lookup("alice@example.com") == "usr1"
+    assert index.lookup("  BOB@example.com ") == "usr2"
+    assert index.lookup("carol@example.com") is None
+
+
+def test_later_syncs_fetch_only_modified_users(index, users):
+    index.sync()
+    users.records = [{"id": "usr4", "fields": {"Email": "dan@example.com"}}]
+    index.sync()
+    assert users.queries[1].startswith("IS_AFTER(LAST_MODIFIED_TIME(), ")
+    # A delta sync adds to the index instead of replacing it
+    assert index.lookup("alice@example.com") == "usr1"
+    assert index.lookup("dan@example.com") == "usr4"
+    index.sync(force_full=True)
+    assert users.queries[2] is None
+    assert index.lookup("alice@example.com") is None
+
+
+def test_resolve_falls_back_to_one_filtered_query(index, users):
+    index.sync()
+    users.records.append({"id": "usr5", "fields": {"Email": "new@example.com"}})
+    assert index.resolve("New@example.com") == "usr5"
+    assert users.queries[1] == "LOWER(TRIM({Email}))='new@example.com'"
+    # The miss is now indexed, and the recent sync isn't repeated
+    assert index.resolve("new@example.com") == "usr5"
+    assert len(users.queries) == 2
+    assert index.resolve("nobody@example.com") is None
+
+
+def test_remove(index):
+    index.add("Eve@example.com", "usr6")
+    assert index.lookup("eve@example.com") == "usr6"
+    index.remove("EVE@example.com")
+    assert index.lookup("eve@example.com") is None
@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+
+@pytest.fixture
+def app(load_app):
+    return load_app("HEADING_RE", "split_sections", "split_fan_out_output")
+
+
+def test_split_fan_out_output_matches_platform_headings(app):
+    output = "## Facebook\nfb post\n## Twitter:\ntweet\n## LinkedIn post\nlinkedin\n## Other\nignored"
+    assert app["split_fan_out_output"](output, ["Facebook", "Twitter", "Instagram", "LinkedIn"]) == {
+        "Facebook": "fb post", "Twitter": "tweet", "LinkedIn": "linkedin"
+    }
+
+
+class FakeContentTable:
+    def __init__(self, records):
+        self.records = records
+        self.batch_updates = []
+
+    def get(self, record_id):
+        return self.records[record_id]
+
+    def all(self, formula=None, fields=None):
+        return [record for record_id, record in self.records.items() if f"'{record_id}'" in formula]
+
+    def batch_update(self, updates):
+        self.batch_updates.extend(updates)
+
+
+class FakeSharedCache:
+    def __init__(self):
+        self.claimed = set()
+
+    def claim(self, key, ttl):
+        if key in self.claimed:
+            return False
+        self.claimed.add(key)
+        return True
+
+
+def fan_out_group(primary_status, child_statuses):
+    ids = ["rec0", "rec1", "rec2"]
+    platforms = ["Facebook", "Twitter", "LinkedIn"]
+    spec = {"schema_version": 1, "content_type": "Social Media Post",
+            "fan_out": {"group": "g", "platforms": platforms, "record_ids": ids, "primary": True, "split": False}}
+    records = {
+        "rec0": {"id": "rec0", "fields": {"Status": primary_status, "Spec": json.dumps(spec), "UserID": ["usr1"],
+                                          "Output": "## Facebook\nfb\n## Twitter\ntweet"}},
+        "rec1": {"id": "rec1", "fields": {"Status": child_statuses[0]}},
+        "rec2": {"id": "rec2", "fields": {"Status": child_statuses[1]}}
+    }
+    return FakeContentTable(records)
+
+
+@pytest.fixture
+def resolve(load_app):
+    def resolve(table):
+        invalidated = []
+        app = load_app("STATUS_TIMESTAMP_FIELDS", "status_fields", "SPEC_SCHEMA_VERSION", "SPEC_MIGRATIONS",
+                       "build_content_spec", "load_content_spec", "dump_content_spec", "HEADING_RE", "split_sections",
+                       "split_fan_out_output", "formula_string", "records_by_id", "pending_fan_out_primary",
+                       "is_pending_fan_out_primary", "resolve_fan_out_group",
+                       content_table=table, invalidate_user_content=lambda email, *ids: invalidated.extend(ids))
+        cache = FakeSharedCache()
+        app["shared_cache"] = lambda: cache
+        app["resolve_fan_out_group"]("rec0", "a@example.com")
+        app["resolve_fan_out_group"]("rec0", "a@example.com")
+        return {update["id"]: update["fields"] for update in table.batch_updates}, invalidated
+    return resolve
+
+
+def test_completed_group_splits_output_once(resolve):
+    updates, invalidated = resolve(fan_out_group("Completed", ["Requested", "Cancelled"]))
+    assert {record_id: fields.get("Status") for record_id, fields in updates.items()} == {
+        "rec0": "Completed", "rec1": "Completed", "rec2": None
+    }
+    assert updates["rec0"]["Output"] == "fb"
+    assert updates["rec1"]["Output"] == "tweet"
+    assert "Output" not in updates["rec2"]
+    assert all(json.loads(fields["Spec"])["fan_out"]["split"] for fields in updates.values())
+    assert invalidated == ["rec0", "rec1", "rec2"]
+
+
+def test_missing_platform_section_fails_that_child(resolve):
+    updates, _ = resolve(fan_out_group("Completed", ["Requested", "Requested"]))
+    assert updates["rec2"]["Status"] == "Failed"
+    assert updates["rec2"]["Output"] == ""
+
+
+def test_cancelled_primary_cancels_the_group(resolve):
+    updates, _ = resolve(fan_out_group("Cancelled", ["Requested", "Requested"]))
+    # The primary is already Cancelled and keeps its own timestamp
+    assert {record_id: fields.get("Status") for record_id, fields in updates.items()} == {
+        "rec0": None, "rec1": "Cancelled", "rec2": "Cancelled"
+    }
+    assert all("Output" not in fields for fields in updates.values())
@@ -0,0 +1,121 @@
+import random
+
+import pytest
+
+
+@pytest.fixture
+def histogram_class(load_app):
+    return load_app("LatencyHistogram")["LatencyHistogram"]
+
+
+def test_small_values_get_exact_buckets(histogram_class):
+    histogram = histogram_class(sub_bucket_bits=6)
+    for value in range(128):
+        assert histogram._index(value) == value
+        assert histogram._value_at(histogram._index(value)) == value
+
+
+def test_bucket_indexes_are_monotonic(histogram_class):
+    histogram = histogram_class(sub_bucket_bits=4)
+    indexes = [histogram._index(value) for value in range(100000)]
+    assert indexes == sorted(indexes)
+
+
+@pytest.mark.parametrize("sub_bucket_bits", [3, 6, 8])
+def test_bucket_value_is_within_relative_error(histogram_class, sub_bucket_bits):
+    histogram = histogram_class(sub_bucket_bits=sub_bucket_bits)
+    bound = 1 / 2 ** sub_bucket_bits
+    for value in list(range(1, 5000)) + [2 ** 20 + 12345, 10 ** 9]:
+        reported = histogram._value_at(histogram._index(value))
+        assert abs(reported - value) / value <= bound
+
+
+def test_negative_and_fractional_values_are_clamped(histogram_class):
+    histogram = histogram_class()
+    histogram.record(-5)
+    histogram.record(2.9)
+    assert histogram.counts == {0: 1, 2: 1}
+
+
+def test_percentiles(histogram_class):
+    histogram = histogram_class()
+    assert histogram.percentile(50) is None
+    for value in range(1, 1001):
+        histogram.record(value)
+    assert histogram.total == 1000
+    for q in (50, 95, 99):
+        assert histogram.percentile(q) == pytest.approx(q * 10, rel=1 / 64)
+    assert histogram.percentile(0) == 1
+    assert histogram.percentile(100) == pytest.approx(1000, rel=1 / 64)
+
+
+def test_merge_matches_recording_into_one(histogram_class):
+    rng = random.Random(7)
+    values = [rng.expovariate(1 / 300) for _ in range(2000)]
+    combined, left, right = histogram_class(), histogram_class(), histogram_class()
+    for index, value in enumerate(values):
+        combined.record(value)
+        (left if index % 2 else right).record(value)
+    left.merge(right)
+    assert left.counts == combined.counts
+    assert left.total == combined.total
+
+
+@pytest.fixture
+def registry(load_app):
+    app = load_app("STATUS_TIMESTAMP_FIELDS", "SPEC_SCHEMA_VERSION", "SPEC_MIGRATIONS", "build_content_spec",
+                   "load_content_spec", "formula_string", "LATENCY_STAGES", "parse_timestamp", "latency_keys",
+                   "LatencyHistogram", "LatencyRegistry", LATENCY_OVERLAP_SECONDS=300)
+    return app["LatencyRegistry"]()
+
+
+def completed(record_id, requested, in_progress, completed_at):
+    return {"id": record_id, "fields": {
+        "ContentType": "Blog Post", "Plan": "Free", "Spec": '{"word_count": 1000}',
+        "RequestedAt": requested, "InProgressAt": in_progress, "CompletedAt": completed_at
+    }}
+
+
+def samples(registry, stage="generation"):
+    result = registry.percentiles(("Blog Post", None, None), stage)
+    return result[1] if result else 0
+
+
+def test_first_refresh_reads_every_completed_record(registry):
+    assert registry.completed_since_formula() == "{CompletedAt}"
+    registry.merge_completed([
+        completed("rec1", "2024-05-01T10:00:00.000Z", "2024-05-01T10:00:30.000Z", "2024-05-01T10:02:30.000Z"),
+        completed("rec2", "2024-05-01T11:00:00.000Z", "2024-05-01T11:00:10.000Z", "2024-05-01T11:01:10.000Z")
+    ])
+    assert samples(registry) == 2
+    assert registry.percentiles(("Blog Post", 1000, "Free"), "queue")[0][50] == 10
+    formula = registry.completed_since_formula()
+    assert formula == "AND({CompletedAt}, NOT(IS_BEFORE({CompletedAt}, '2024-05-01T10:56:10+00:00')))"
+
+
+def test_later_refreshes_merge_without_double_counting(registry):
+    registry.merge_completed([
+        completed("rec1", "2024-05-01T10:00:00.000Z", "2024-05-01T10:00:30.000Z", "2024-05-01T10:02:30.000Z"),
+        completed("rec2", "2024-05-01T11:00:00.000Z", "2024-05-01T11:00:10.000Z", "2024-05-01T11:01:10.000Z")
+    ])
+    # The overlap re-reads rec2; rec3 is new and rec2 completed again after a regeneration would count again
+    registry.merge_completed([
+        completed("rec2", "2024-05-01T11:00:00.000Z", "2024-05-01T11:00:10.000Z", "2024-05-01T11:01:10.000Z"),
+        completed("rec3", "2024-05-01T11:05:00.000Z", "2024-05-01T11:05:05.000Z", "2024-05-01T11:06:05.000Z")
+    ])
+    assert samples(registry) == 3
+    registry.merge_completed([
+        completed("rec2", "2024-05-01T12:00:00.000Z", "2024-05-01T12:00:10.000Z", "2024-05-01T12:01:10.000Z")
+    ])
+    assert samples(registry) == 4
+    assert registry.watermark.isoformat() == "2024-05-01T12:01:10+00:00"
+    # Only records inside the overlap window are remembered
+    assert set(registry.recent) == {"rec2"}
+
+
+def test_empty_refresh_keeps_the_watermark(registry):
+    registry.merge_completed([])
+    assert registry.completed_since_formula() == "{CompletedAt}"
+    registry.merge_completed([completed("rec1", None, None, "2024-05-01T10:02:30.000Z")])
+    registry.merge_completed([])
+    assert registry.watermark.isoformat() == "2024-05-01T10:02:30+00:00"
@@ -0,0 +1,54 @@
+import base64
+import hashlib
+import os
+
+import pytest
+
+
+@pytest.fixture
+def app(load_app):
+    return load_app("PASSWORD_HASH_ALGORITHM", "LEGACY_PASSWORD_ITERATIONS", "hash_password", "parse_password_hash",
+                    "verify_password", "password_needs_rehash", PASSWORD_HASH_ITERATIONS=1000)
+
+
+def legacy_hash(password):
+    salt = os.urandom(16)
+    return base64.b64encode(salt + hashlib.pbkdf2_hmac('sha256', password.encode(), salt, 100000)).decode()
+
+
+def test_hash_is_self_describing(app):
+    stored = app["hash_password"]("secret")
+    algorithm, iterations, salt, hashed = app["parse_password_hash"](stored)
+    assert stored.startswith("pbkdf2_sha256$1000$")
+    assert (algorithm, iterations, len(salt), len(hashed)) == ("pbkdf2_sha256", 1000, 16, 32)
+    assert hashed == hashlib.pbkdf2_hmac('sha256', b"secret", salt, 1000)
+
+
+def test_verify_password(app):
+    stored = app["hash_password"]("secret", iterations=2000)
+    assert app["verify_password"](stored, "secret")
+    assert not app["verify_password"](stored, "Secret")
+
+
+def test_legacy_hash_is_parsed_and_verified(app):
+    stored = legacy_hash("secret")
+    algorithm, iterations, salt, hashed = app["parse_password_hash"](stored)
+    assert (algorithm, iterations, len(salt), len(hashed)) == ("pbkdf2_sha256", 100000, 16, 32)
+    assert app["verify_password"](stored, "secret")
+    assert not app["verify_password"](stored, "other")
+
+
+@pytest.mark.parametrize("stored", [None, "", "not base64!", "pbkdf2_sha256$1000$salt", "pbkdf2_sha256$many$c2FsdA==$aGFzaA=="])
+def test_malformed_hashes_do_not_verify(app, stored):
+    assert not app["verify_password"](stored, "secret")
+
+
+def test_unknown_algorithm_does_not_verify(app):
+    stored = app["hash_password"]("secret").replace("pbkdf2_sha256", "md5", 1)
+    assert not app["verify_password"](stored, "secret")
+
+
+def test_password_needs_rehash(app):
+    assert app["password_needs_rehash"](legacy_hash("secret"))
+    assert app["password_needs_rehash"](app["hash_password"]("secret", iterations=500))
+    assert not app["password_needs_rehash"](app["hash_password"]("secret"))
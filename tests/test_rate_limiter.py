@@ -0,0 +1,62 @@
+import pytest
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def limiter(load_app):
+    app = load_app("RateLimiter")
+    app["time"] = FakeClock()
+    return app["RateLimiter"](rate=5), app["time"]
+
+
+def test_background_calls_leave_the_reserve(limiter):
+    limiter, clock = limiter
+    assert [limiter.try_acquire(reserve=2) for _ in range(4)] == [True, True, True, False]
+    # The foreground can still spend the reserved tokens
+    assert [limiter.try_acquire() for _ in range(3)] == [True, True, False]
+    assert clock.sleeps == []
+
+
+def test_tokens_refill_at_the_rate(limiter):
+    limiter, clock = limiter
+    for _ in range(5):
+        assert limiter.try_acquire()
+    clock.now += 0.2
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+    clock.now += 10
+    assert limiter.tokens == pytest.approx(0, abs=1e-9)
+    assert limiter.try_acquire()
+    # Capped at the burst size
+    assert limiter.tokens == pytest.approx(4)
+
+
+def test_acquire_waits_for_a_token(limiter):
+    limiter, clock = limiter
+    for _ in range(5):
+        limiter.try_acquire()
+    assert limiter.acquire(timeout=1)
+    assert clock.sleeps == [pytest.approx(0.2)]
+
+
+def test_acquire_gives_up_when_the_wait_exceeds_the_timeout(limiter):
+    limiter, clock = limiter
+    for _ in range(5):
+        limiter.try_acquire()
+    # A reserve of 2 needs three tokens to refill: 0.6s
+    assert not limiter.acquire(reserve=2, timeout=0.5)
+    assert clock.sleeps == []
+    assert limiter.acquire(reserve=2, timeout=0.7)
+    assert clock.sleeps == [pytest.approx(0.6)]
@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+
+def record(record_id, status="Completed", text=""):
+    return {"id": record_id, "fields": {"Status": status, "Output": text}}
+
+
+def size(value):
+    return len(json.dumps(value))
+
+
+@pytest.fixture
+def app(load_app):
+    stale = []
+    app = load_app("RecordCache", "record_ttl", "get_record_detail", RECORD_CACHE_BYTES=1024, ACTIVE_RECORD_TTL=5,
+                   SETTLED_RECORD_TTL=300, guarded=lambda name, call: call(), note_stale=stale.append)
+    app["stale"] = stale
+    return app
+
+
+def test_evicts_least_recently_used_within_the_byte_budget(app):
+    a, b, c = record("a", text="x" * 40), record("b", text="y" * 40), record("c", text="z" * 40)
+    cache = app["RecordCache"](max_bytes=size(a) * 2)
+    cache.put("a", a, 60)
+    cache.put("b", b, 60)
+    assert cache.get("a") == a
+    cache.put("c", c, 60)
+    assert list(cache.entries) == ["a", "c"]
+    assert cache.get("b") is None
+    assert cache.size == size(a) + size(c)
+
+
+def test_replacing_and_invalidating_keep_the_size(app):
+    cache = app["RecordCache"](max_bytes=1024)
+    cache.put("a", record("a", text="short"), 60)
+    cache.put("a", record("a", text="much longer text"), 60)
+    assert cache.size == size(record("a", text="much longer text"))
+    cache.invalidate("a")
+    cache.invalidate("missing")
+    assert (cache.size, len(cache.entries)) == (0, 0)
+
+
+def test_oversized_records_are_not_cached(app):
+    cache = app["RecordCache"](max_bytes=64)
+    cache.put("small", record("s"), 60)
+    cache.put("big", record("b", text="x" * 100), 60)
+    assert list(cache.entries) == ["small"]
+
+
+def test_expired_entries_are_only_peeked(app):
+    cache = app["RecordCache"](max_bytes=1024)
+    cache.put("a", record("a"), -1)
+    assert cache.get("a") is None
+    assert cache.peek("a") == record("a")
+
+
+def test_record_ttl(app):
+    assert app["record_ttl"](record("a", "Completed")) == 300
+    assert app["record_ttl"](record("a", "In Progress")) == 5
+
+
+class FlakyTable:
+    def __init__(self):
+        self.fail = False
+        self.calls = 0
+
+    def get(self, record_id):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("down")
+        return record(record_id)
+
+
+def test_detail_falls_back_to_an_expired_copy(app):
+    cache = app["RecordCache"](max_bytes=1024)
+    app["record_cache"] = lambda: cache
+    table = FlakyTable()
+    assert app["get_record_detail"]("content", table, "rec1") == record("rec1")
+    assert app["get_record_detail"]("content", table, "rec1") == record("rec1")
+    assert table.calls == 1
+    cache.put(("content", "rec1"), record("rec1"), -1)
+    table.fail = True
+    assert app["get_record_detail"]("content", table, "rec1") == record("rec1")
+    assert app["stale"] == ["details"]
+    with pytest.raises(ConnectionError):
+        app["get_record_detail"]("content", table, "rec2")
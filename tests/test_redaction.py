@@ -0,0 +1,48 @@
+import pytest
+
+
+@pytest.fixture
+def app(load_app):
+    return load_app("REDACTED_PAYLOAD_KEYS", "REDACTION_PATTERNS", "redact_text", "redact_payload",
+                    LOG_MAX_MESSAGE_CHARS=80, LOG_MAX_FIELD_CHARS=10)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Login failed for Jane.Doe+x@example.co.uk", "Login failed for <email>"),
+    ("Authorization: Bearer abc.DEF-123", "Authorization: Bearer <token>"),
+    ("using patABCDEFGHIJKLMN.0123456789abcdef0123456789", "using <airtable-token>"),
+    ("stripe sk_live_51HxYz and pk_test_abc", "stripe <stripe-key> and <stripe-key>"),
+    ("{'password': 'hunter2', 'api_key'=xyz}", "{'password': '<redacted>', 'api_key'=<redacted>}"),
+    ("token=abc123 next", "token=<redacted> next")
+])
+def test_redact_text(app, text, expected):
+    assert app["redact_text"](text) == expected
+
+
+def test_redact_text_truncates_after_redacting(app):
+    text = "a@example.com " + "x" * 100
+    redacted = app["redact_text"](text)
+    assert redacted.startswith("<email> xxx")
+    assert redacted.endswith(f"... <{len('<email> ') + 100 - 80} more chars>")
+
+
+def test_redact_payload(app):
+    payload = {
+        "record_id": "rec123",
+        "details": {"topic": "secret plans"},
+        "output": "",
+        "sections": [{"text": "user content"}],
+        "fan_out": [{"record_id": "rec456", "text": "child content", "note": "a long note here"}],
+        "token_cost": 3
+    }
+    redacted = app["redact_payload"](payload)
+    assert redacted == {
+        "record_id": "rec123",
+        "details": "<25 chars>",
+        # Empty values stay as they are
+        "output": "",
+        "sections": "<26 chars>",
+        "fan_out": [{"record_id": "rec456", "text": "<15 chars>", "note": "a long not..."}],
+        "token_cost": 3
+    }
+    assert payload["details"] == {"topic": "secret plans"}
@@ -0,0 +1,51 @@
+import contextvars
+
+import pytest
+
+# Every Streamlit rerun executes streamlit_app.py as a new module, while st.cache_resource values survive
+# from the rerun that built them. Each test loads the app twice and mixes objects from both.
+
+SETTINGS = dict(BREAKER_FAILURE_THRESHOLD=3, BREAKER_SLOW_CALL_SECONDS=5, BREAKER_OPEN_SECONDS=30,
+                DEFAULT_CALL_TIMEOUT=10, MIN_CALL_TIMEOUT=1)
+
+
+@pytest.fixture
+def reruns(load_app):
+    names = ("CircuitBreaker", "set_deadline", "remaining_budget", "call_timeout")
+    first, second = load_app(*names, **SETTINGS), load_app(*names, **SETTINGS)
+    assert first["CircuitBreaker"] is not second["CircuitBreaker"]
+    return first, second
+
+
+def test_cached_breaker_ignores_throttling_raised_in_a_later_rerun(reruns):
+    first, second = reruns
+    breaker = first["CircuitBreaker"]("content")
+
+    def throttled():
+        raise second["AirtableRateLimited"]("no token")
+
+    for _ in range(5):
+        with pytest.raises(second["AirtableRateLimited"]):
+            breaker.call(throttled)
+    assert not breaker.is_open()
+    assert breaker.failures == 0
+
+
+def test_open_circuit_is_caught_by_a_later_rerun(reruns):
+    first, second = reruns
+    breaker = first["CircuitBreaker"]("content")
+    breaker.opened_at = float("inf")
+    with pytest.raises(second["UpstreamUnavailable"]):
+        breaker.call(lambda: "never called")
+
+
+def test_deadline_set_in_a_later_rerun_reaches_cached_sessions(reruns):
+    first, second = reruns
+
+    def rerun():
+        second["set_deadline"](3)
+        return first["remaining_budget"](), first["call_timeout"]()
+
+    remaining, timeout = contextvars.copy_context().run(rerun)
+    assert 2.5 < remaining <= 3
+    assert timeout == pytest.approx(remaining, abs=0.1)
@@ -0,0 +1,73 @@
+import time
+
+import pytest
+
+
+@pytest.fixture
+def app(load_app):
+    return load_app("CircuitBreaker", BREAKER_FAILURE_THRESHOLD=3, BREAKER_SLOW_CALL_SECONDS=5, BREAKER_OPEN_SECONDS=0.05)
+
+
+def fail():
+    raise ConnectionError("upstream down")
+
+
+def trip(breaker, times):
+    for _ in range(times):
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+
+
+def test_opens_after_consecutive_failures(app):
+    breaker = app["CircuitBreaker"]("content")
+    trip(breaker, 2)
+    assert breaker.call(lambda: "ok") == "ok"
+    trip(breaker, 2)
+    assert not breaker.is_open()
+    trip(breaker, 1)
+    assert breaker.is_open()
+    with pytest.raises(app["UpstreamUnavailable"]):
+        breaker.call(lambda: "never called")
+
+
+def test_half_open_trial_closes_on_success(app):
+    breaker = app["CircuitBreaker"]("content")
+    trip(breaker, 3)
+    time.sleep(0.06)
+    assert breaker.call(lambda: "ok") == "ok"
+    assert not breaker.is_open()
+    assert breaker.failures == 0
+
+
+def test_half_open_trial_reopens_on_failure(app):
+    breaker = app["CircuitBreaker"]("content")
+    trip(breaker, 3)
+    time.sleep(0.06)
+    trip(breaker, 1)
+    assert breaker.is_open()
+
+
+def test_only_one_trial_at_a_time(app):
+    breaker = app["CircuitBreaker"]("content")
+    trip(breaker, 3)
+    time.sleep(0.06)
+    outcomes = []
+
+    def trial():
+        # A second caller arriving while the trial is in flight fails fast
+        with pytest.raises(app["UpstreamUnavailable"]):
+            breaker.call(lambda: "second")
+        outcomes.append("rejected")
+        return "first"
+
+    assert breaker.call(trial) == "first"
+    assert outcomes == ["rejected"]
+
+
+def test_slow_success_counts_as_failure(app):
+    app["BREAKER_SLOW_CALL_SECONDS"] = 0
+    breaker = app["CircuitBreaker"]("content")
+    for _ in range(3):
+        breaker.call(lambda: "slow")
+    assert breaker.is_open()
+
@@ -0,0 +1,57 @@
+import pytest
+
+RESUME = """Jane Doe
+jane.doe+cv@example.com | +1 (555) 123-4567
+linkedin.com/in/janedoe https://github.com/janedoe
+
+Professional Summary:
+Backend engineer.
+
+Work Experience
+Acme Corp - Engineer
+  Built things.
+
+SKILLS
+Python, SQL
+"""
+
+
+@pytest.fixture
+def app(load_app):
+    return load_app("RESUME_SCHEMA_VERSION", "RESUME_SECTION_HEADINGS", "RESUME_HEADING_LOOKUP", "EMAIL_RE", "PHONE_RE",
+                    "LINK_RE", "extract_resume_text", "segment_resume", "parse_resume")
+
+
+def test_segment_resume(app):
+    parsed = app["segment_resume"](RESUME)
+    contact = parsed["contact"]
+    assert contact["lines"][0] == "Jane Doe"
+    assert contact["emails"] == ["jane.doe+cv@example.com"]
+    assert contact["phones"] == ["+1 (555) 123-4567"]
+    assert contact["links"] == ["linkedin.com/in/janedoe", "https://github.com/janedoe"]
+    assert parsed["sections"] == {
+        "summary": "Backend engineer.",
+        "experience": "Acme Corp - Engineer\n  Built things.",
+        "skills": "Python, SQL"
+    }
+
+
+def test_headings_match_whole_lines(app):
+    parsed = app["segment_resume"]("Education\nBSc\nSkills\nExperience with Python\nProjects")
+    assert parsed["sections"]["education"] == "BSc"
+    # A line that only starts with a heading is content, and an empty trailing section is kept
+    assert parsed["sections"]["skills"] == "Experience with Python"
+    assert parsed["sections"]["projects"] == ""
+
+
+def test_text_without_headings_is_all_contact(app):
+    parsed = app["segment_resume"]("Jane Doe\n\nNo sections here")
+    assert parsed["contact"]["lines"] == ["Jane Doe", "No sections here"]
+    assert parsed["sections"] == {}
+
+
+def test_parse_resume_stamps_the_schema_version(app):
+    parsed = app["parse_resume"](RESUME.encode(), "cv.txt")
+    assert parsed["schema_version"] == app["RESUME_SCHEMA_VERSION"]
+    assert parsed["text"] == RESUME
+    assert parsed["sections"]["skills"] == "Python, SQL"
@@ -0,0 +1,105 @@
+import json
+
+import pytest
+
+
+class FakeTable:
+    def __init__(self):
+        self.updates = []
+
+    def update(self, record_id, fields):
+        self.updates.append((record_id, fields))
+
+
+@pytest.fixture
+def app(load_app):
+    invalidated = []
+    return load_app(
+        "HEADING_RE", "split_sections", "join_sections", "changed_section_indexes", "plan_regeneration",
+        "merge_section_output",
+        content_table=FakeTable(), invalidate_content_detail=invalidated.append, invalidated=invalidated
+    )
+
+
+ARTICLE = "Intro line\n\n# Title\nfirst body\n\n## Part two\nsecond body\nmore\n### Part three\nthird body"
+
+
+def test_split_sections_keeps_preamble_and_headings(app):
+    sections = app["split_sections"](ARTICLE)
+    assert [s["heading"] for s in sections] == ["", "# Title", "## Part two", "### Part three"]
+    assert sections[0]["body"] == "Intro line\n"
+    assert sections[2]["body"] == "second body\nmore"
+
+
+def test_split_sections_drops_blank_preamble(app):
+    sections = app["split_sections"]("\n# Only\nbody")
+    assert sections == [{"heading": "# Only", "body": "body"}]
+
+
+def test_split_sections_ignores_hashes_without_heading_text(app):
+    sections = app["split_sections"]("#hashtag\n#\nplain")
+    assert sections == [{"heading": "", "body": "#hashtag\n#\nplain"}]
+
+
+@pytest.mark.parametrize("output", [ARTICLE, "# A\na", "no headings at all", "# A\n\n# B\n"])
+def test_join_sections_round_trips(app, output):
+    assert app["join_sections"](app["split_sections"](output)) == output
+
+
+def test_changed_section_indexes_reports_edited_body(app):
+    edited = ARTICLE.replace("second body", "rewritten body")
+    assert app["changed_section_indexes"](ARTICLE, edited) == [2]
+
+
+def test_changed_section_indexes_reports_inserted_section(app):
+    edited = ARTICLE.replace("## Part two", "## New part\nnew body\n## Part two")
+    assert app["changed_section_indexes"](ARTICLE, edited) == [2]
+
+
+def test_changed_section_indexes_ignores_surrounding_whitespace(app):
+    edited = ARTICLE.replace("first body\n", "first body\n\n\n")
+    assert app["changed_section_indexes"](ARTICLE, edited) == []
+
+
+def test_plan_regeneration_limits_to_changed_sections(app):
+    fields = {"Output": ARTICLE, "Details": "details"}
+    edited = ARTICLE.replace("third body", "new third")
+    plan = app["plan_regeneration"](fields, {"word_count": 500}, {"word_count": 500}, "details", edited)
+    assert plan == [{"heading": "### Part three", "body": "new third", "index": 3}]
+
+
+def test_plan_regeneration_is_full_when_spec_or_details_change(app):
+    fields = {"Output": ARTICLE, "Details": "details"}
+    edited = ARTICLE.replace("third body", "new third")
+    assert app["plan_regeneration"](fields, {"word_count": 500}, {"word_count": 800}, "details", edited) is None
+    assert app["plan_regeneration"](fields, {"word_count": 500}, {"word_count": 500}, "other", edited) is None
+
+
+def test_merge_section_output_replaces_sections_highest_index_first(app):
+    fields = {
+        "Status": "Completed",
+        "Output": "# A\na\n# B\nb\n# C\nc",
+        # Section 0 comes back as two sections; section 2 must still land on the original "# C"
+        "SectionOutput": json.dumps({"0": "# A\nnew a\n# A2\nextra", "2": "# C\nnew c"})
+    }
+    merged = app["merge_section_output"]("rec1", fields)
+    assert merged["Output"] == "# A\nnew a\n# A2\nextra\n# B\nb\n# C\nnew c"
+    assert merged["SectionOutput"] == ""
+    assert app["content_table"].updates == [("rec1", {"Output": merged["Output"], "SectionOutput": ""})]
+    assert app["invalidated"] == ["rec1"]
+
+
+def test_merge_section_output_skips_out_of_range_and_empty_results(app):
+    fields = {"Status": "Completed", "Output": "# A\na", "SectionOutput": json.dumps({"5": "# Z\nz", "0": ""})}
+    assert app["merge_section_output"]("rec1", fields)["Output"] == "# A\na"
+
+
+@pytest.mark.parametrize("fields", [
+    {"Status": "In Progress", "Output": "# A\na", "SectionOutput": json.dumps({"0": "# A\nx"})},
+    {"Status": "Completed", "Output": "# A\na", "SectionOutput": "not json"},
+    {"Status": "Completed", "Output": "# A\na"}
+])
+def test_merge_section_output_leaves_record_alone(app, fields):
+    assert app["merge_section_output"]("rec1", fields) is fields
+    assert app["content_table"].updates == []
+
@@ -0,0 +1,132 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+
+@pytest.fixture
+def app(load_app, tmp_path):
+    def local_db(name):
+        conn = sqlite3.connect(str(tmp_path / name), timeout=10, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+    return load_app("STATE_INVALIDATION_CHANNEL", "STATE_VERSION_RETENTION", "InProcessStateBackend",
+                    "SQLiteStateBackend", "RedisStateBackend", "SharedCache",
+                    local_db=local_db, LOCAL_CACHE_TTL=5)
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend(request, app):
+    if request.param == "memory":
+        return app["InProcessStateBackend"]()
+    if request.param == "sqlite":
+        return app["SQLiteStateBackend"]("state.db", poll_seconds=0.05)
+    fakeredis = pytest.importorskip("fakeredis")
+    backend = app["RedisStateBackend"].__new__(app["RedisStateBackend"])
+    backend.client = fakeredis.FakeRedis(decode_responses=True)
+    backend.pubsub = None
+    return backend
+
+
+def test_missing_key_has_version_zero(backend):
+    assert backend.get("k") == (None, 0)
+
+
+def test_set_bumps_version(backend):
+    assert backend.set("k", {"a": 1}) == 1
+    assert backend.set("k", {"a": 2}) == 2
+    assert backend.get("k") == ({"a": 2}, 2)
+
+
+def test_set_if_version(backend):
+    assert backend.set("k", "new", if_version=0) == 1
+    assert backend.set("k", "lost", if_version=0) is None
+    assert backend.set("k", "won", if_version=1) == 2
+    assert backend.get("k") == ("won", 2)
+
+
+def test_delete_bumps_version_even_for_missing_key(backend):
+    backend.delete("missing")
+    assert backend.get("missing") == (None, 1)
+    backend.set("k", "v")
+    backend.delete("k")
+    assert backend.get("k") == (None, 2)
+    assert backend.set("k", "stale", if_version=1) is None
+
+
+def test_expired_entry_keeps_its_version(backend):
+    backend.set("k", "v", ttl=0.05)
+    time.sleep(0.1)
+    assert backend.get("k") == (None, 1)
+    assert backend.set("k", "again", if_version=1) == 2
+
+
+def test_load_does_not_overwrite_a_newer_write(app, backend):
+    cache = app["SharedCache"](backend)
+
+    def loader():
+        # Another replica writes while the load is running
+        backend.set("k", "written")
+        return "loaded"
+
+    assert cache.load("k", loader) == "loaded"
+    assert backend.get("k") == ("written", 1)
+
+
+def test_load_does_not_resurrect_an_invalidated_key(app, backend):
+    cache = app["SharedCache"](backend)
+    backend.set("k", "old")
+
+    def loader():
+        cache.invalidate("k")
+        return "loaded before the invalidation"
+
+    cache.load("k", loader)
+    assert backend.get("k")[0] is None
+
+
+def test_update_retries_after_a_concurrent_write(app, backend):
+    cache = app["SharedCache"](backend)
+    backend.set("count", 0)
+    interfered = []
+
+    def increment(value):
+        if not interfered:
+            interfered.append(True)
+            backend.set("count", 10)
+        return value + 1
+
+    assert cache.update("count", increment) == 11
+    assert backend.get("count") == (11, 3)
+
+
+def test_claim_is_granted_once(app, backend):
+    cache = app["SharedCache"](backend)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.claim("job", ttl=60))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(results) == [False] * 7 + [True]
+
+
+def test_claim_is_granted_again_after_expiry(app, backend):
+    cache = app["SharedCache"](backend)
+    assert cache.claim("job", ttl=0.05)
+    assert not cache.claim("job", ttl=0.05)
+    time.sleep(0.1)
+    assert cache.claim("job", ttl=0.05)
+
+
+def test_invalidation_reaches_other_caches(app, backend):
+    writer = app["SharedCache"](backend)
+    reader = app["SharedCache"](backend)
+    writer.set("k", "v1")
+    assert reader.get("k") == "v1"
+    writer.set("k", "v2")
+    deadline = time.time() + 2
+    while reader.get("k") != "v2" and time.time() < deadline:
+        time.sleep(0.02)
+    assert reader.get("k") == "v2"
@@ -0,0 +1,79 @@
+import json
+import sqlite3
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+
+@pytest.fixture
+def app(load_app, tmp_path):
+    def local_db(name):
+        return sqlite3.connect(str(tmp_path / name), timeout=10, check_same_thread=False)
+    return load_app("OutputChunkStore", "ChunkCallbackHandler", local_db=local_db)
+
+
+def test_chunk_store_reads_after_sequence(app):
+    store = app["OutputChunkStore"]()
+    store.append("rec1", 0, "Hello ")
+    store.append("rec1", 2, "!", done=True)
+    store.append("rec1", 1, "world")
+    store.append("rec2", 0, "other")
+    assert store.read("rec1") == ([(0, "Hello "), (1, "world"), (2, "!")], True)
+    assert store.read("rec1", after_seq=0) == ([(1, "world"), (2, "!")], True)
+    assert store.read("rec1", after_seq=2) == ([], False)
+    # A retried chunk replaces the first delivery
+    store.append("rec2", 0, "other, again")
+    assert store.read("rec2") == ([(0, "other, again")], False)
+    store.clear("rec1")
+    assert store.read("rec1") == ([], False)
+
+
+@pytest.fixture
+def callback(app):
+    store = app["OutputChunkStore"]()
+    handler = type("BoundChunkCallbackHandler", (app["ChunkCallbackHandler"],), {"store": store, "token": "s3cret"})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+    def post(path, body, token="s3cret"):
+        headers = {"Content-Type": "application/json"}
+        if token is not None:
+            headers["X-Stream-Token"] = token
+        request = urllib.request.Request(f"http://127.0.0.1:{server.server_port}{path}", data=json.dumps(body).encode(),
+                                         headers=headers, method="POST")
+        try:
+            with opener.open(request) as response:
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    yield store, post
+    server.shutdown()
+    server.server_close()
+
+
+def test_callback_appends_chunks(callback):
+    store, post = callback
+    assert post("/chunks/rec1", {"seq": 0, "text": "Hello"}) == 204
+    assert post("/chunks/rec1", {"seq": 1, "text": "", "done": True}) == 204
+    assert store.read("rec1") == ([(0, "Hello"), (1, "")], True)
+
+
+@pytest.mark.parametrize("token", [None, "", "wrong"])
+def test_callback_requires_the_token(callback, token):
+    store, post = callback
+    assert post("/chunks/rec1", {"seq": 0, "text": "injected"}, token=token) == 403
+    assert store.read("rec1") == ([], False)
+
+
+def test_callback_rejects_bad_requests(callback):
+    store, post = callback
+    assert post("/other/rec1", {"seq": 0}) == 404
+    assert post("/chunks/rec1", {"text": "no seq"}) == 400
+    assert post("/chunks/rec1", {"seq": "x"}) == 400
+    assert store.read("rec1") == ([], False)
@@ -0,0 +1,80 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from app_shared import ContentItem, RecordStatus, Resume, TypedViewCache
+
+CONTENT_RECORD = {
+    "id": "rec1",
+    "createdTime": "2024-05-01T10:00:00.000Z",
+    "fields": {"ContentType": "Blog Post", "Status": "Completed", "Spec": json.dumps({"schema_version": 1, "word_count": 900})}
+}
+
+
+@pytest.fixture
+def app(load_app):
+    return load_app("parse_timestamp", "SPEC_SCHEMA_VERSION", "SPEC_MIGRATIONS", "build_content_spec", "load_content_spec",
+                    "content_item", "resume_item", "build_content_items", "owned_by")
+
+
+def test_content_item_keeps_only_parsed_attributes(app):
+    item = app["content_item"](CONTENT_RECORD)
+    assert (item.id, item.content_type, item.status, item.spec["word_count"]) == ("rec1", "Blog Post", "Completed", 900)
+    assert item.created == datetime(2024, 5, 1, 10, tzinfo=timezone.utc)
+    assert item.label == "Blog Post - Completed\nCreated: 2024-05-01T10:00:00.000Z"
+    assert not hasattr(item, "fields")
+    assert not hasattr(item, "__dict__")
+
+
+def test_resume_item(app):
+    item = app["resume_item"]({"id": "rec2", "fields": {"Type": "User Uploaded", "Status": "Uploaded", "OriginalFileName": "cv.pdf"}})
+    assert (item.kind, item.status, item.file_name, item.created) == ("User Uploaded", RecordStatus.UPLOADED, "cv.pdf", None)
+    assert item.label == "cv.pdf - Uploaded\nCreated: N/A"
+
+
+def test_unknown_status_parses_as_unknown():
+    item = ContentItem("rec1", "N/A", None, None, "Archived?", {})
+    assert item.status is RecordStatus.UNKNOWN
+    assert item.label == "Untitled - N/A\nCreated: N/A"
+
+
+def test_items_from_an_earlier_rerun_compare_by_value(load_app, app):
+    # Lists built in an earlier rerun stay in typed_views(); later reruns filter and count them
+    earlier = app["build_content_items"]([CONTENT_RECORD])
+    later = load_app("content_item")
+    assert earlier[0].status == "Completed"
+    assert earlier[0].status in ["Requested", "Completed"]
+    assert type(earlier[0]) is later["ContentItem"]
+
+
+def test_owned_by(app):
+    assert app["owned_by"]({"fields": {"UserEmail": ["a@example.com"]}}, "a@example.com")
+    assert not app["owned_by"]({"fields": {}}, "a@example.com")
+
+
+def test_typed_view_cache_rebuilds_when_the_stamp_changes():
+    cache = TypedViewCache(max_entries=2)
+    builds = []
+
+    def build(raw):
+        builds.append(raw)
+        return [raw]
+
+    first = cache.get("k", (1, 100.0), "raw", build)
+    assert cache.get("k", (1, 100.0), "deserialised again", build) is first
+    assert cache.get("k", (2, 100.0), "updated", build) == ["updated"]
+    assert cache.get("k", None, "cold", build) == ["cold"]
+    assert cache.get("k", (2, 100.0), "updated", build) == ["updated"]
+    assert builds == ["raw", "updated", "cold"]
+
+
+def test_typed_view_cache_keeps_only_built_views():
+    cache = TypedViewCache(max_entries=2)
+    raw = [{"id": "rec1"}]
+    cache.get("a", (1, 1.0), raw, list)
+    cache.get("b", (1, 1.0), raw, list)
+    cache.get("c", (1, 1.0), raw, list)
+    assert list(cache.entries) == ["b", "c"]
+    assert all(entry[1] is not raw for entry in cache.entries.values())
+    assert all(entry[0] == (1, 1.0) for entry in cache.entries.values())
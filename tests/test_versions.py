@@ -0,0 +1,59 @@
+import json
+import sqlite3
+
+import pytest
+
+EDITS = [
+    "",
+    "one line without newline",
+    "# Title\nfirst\nsecond\nthird\n",
+    "# Title\nfirst\nchanged second\nthird\n",
+    "# Title\nthird\n",
+    "# New title\nprefix\n# Title\nthird\nappended",
+    "\n\n\n",
+    "# Title\r\nwindows lines\r\nkept\r\n"
+]
+
+
+@pytest.fixture
+def app(load_app, tmp_path):
+    def local_db(name):
+        return sqlite3.connect(str(tmp_path / name), timeout=10, check_same_thread=False)
+    return load_app("diff_lines", "apply_line_diff", "ContentVersionStore",
+                    local_db=local_db, VERSION_SNAPSHOT_INTERVAL=3)
+
+
+@pytest.mark.parametrize("previous", EDITS)
+@pytest.mark.parametrize("current", EDITS)
+def test_line_diff_replays_exactly(app, previous, current):
+    ops = app["diff_lines"](previous, current)
+    # Deltas are stored as JSON
+    ops = json.loads(json.dumps(ops))
+    assert app["apply_line_diff"](previous, ops) == current
+
+
+def test_line_diff_copies_unchanged_lines_by_range(app):
+    previous = "".join(f"line {i}\n" for i in range(100))
+    current = previous.replace("line 50\n", "edited\n")
+    ops = app["diff_lines"](previous, current)
+    assert ops == [["c", 0, 50], ["i", ["edited\n"]], ["c", 51, 100]]
+
+
+def test_version_store_replays_deltas_from_nearest_snapshot(app):
+    store = app["ContentVersionStore"]("versions.db")
+    for index, output in enumerate(EDITS[1:]):
+        assert store.add("rec1", output, f"details {index}", "Edited") == index + 1
+    kinds = {v["version"]: v["kind"] for v in store.versions("rec1")}
+    assert [kinds[v] for v in sorted(kinds)] == ["snapshot", "delta", "delta", "snapshot", "delta", "delta", "snapshot"]
+    for index, output in enumerate(EDITS[1:]):
+        assert store.get("rec1", index + 1) == {"output": output, "details": f"details {index}"}
+
+
+def test_version_store_skips_unchanged_versions(app):
+    store = app["ContentVersionStore"]("versions.db")
+    assert store.add("rec1", "text\n", "details", "Generated") == 1
+    assert store.add("rec1", "text\n", "details", "Edited") is None
+    assert store.add("rec1", "text\n", "other details", "Edited") == 2
+    assert store.latest_version("rec1") == 2
+    assert store.latest_version("rec2") == 0
+    assert store.get("rec2", 1) is None